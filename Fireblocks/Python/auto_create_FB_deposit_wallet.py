@@ -29,68 +29,224 @@
 ----------------------------------------------------------------------------
 """
 
-from fireblocks_sdk import FireblocksSDK
+from fireblocks_sdk import FireblocksSDK, PagedVaultAccountsRequestFilters
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+import json
 import os
 
+from fireblocks_throttle import RateLimiter, bounded_map, call
+from vault_address_index import address_label
+
 # Set up API credentials
 API_SECRET_PATH = "path_to_your_private_key.pem"
 API_KEY = "your_fireblocks_api_key_here"
 
+# Vault accounts per page (Fireblocks allows up to 500)
+VAULT_PAGE_SIZE = 500
+# Newest createdAt handled so far; later runs only look at newer addresses
+HIGH_WATER_MARK_PATH = "recent_deposit_addresses.hwm"
+# How far back the first run (without a high-water mark) looks
+INITIAL_LOOKBACK_HOURS = 24
+# The mark never passes this long before the run started, so addresses
+# created while pages were streaming (or under clock skew) are seen again
+HIGH_WATER_MARK_SLACK_SECONDS = 300
+
+# Tagged addresses every deposit wallet should have
+ADDRESS_TAGS = ("deposit_front", "quarantine")
+# Vault wallets provisioned in parallel
+PROVISION_CONCURRENCY = 4
+# Fireblocks requests per second across all workers
+FIREBLOCKS_RATE_LIMIT = 5
+# One JSON line per provisioned address; lets an interrupted batch resume
+PROVISION_JOURNAL_PATH = "provisioning_journal.jsonl"
+
 def get_fireblocks_sdk():
     with open(API_SECRET_PATH, "r") as key_file:
         private_key = key_file.read()
     return FireblocksSDK(private_key, API_KEY)
 
-# Function to get deposit addresses created in the last 24 hours
-def get_recent_deposit_addresses(fireblocks):
-    recent_deposit_addresses = []
-    cutoff_time = datetime.utcnow() - timedelta(hours=24)
-
-    vault_accounts = fireblocks.get_vault_accounts()
-
-    for account in vault_accounts:
-        addresses = account.get("assets", [])
-        for asset in addresses:
+# createdAt values look like "2025-02-20T11:38:19.718Z". Normalising the
+# fraction to six digits makes them sortable as plain strings, which is far
+# cheaper than datetime.strptime for every address.
+def created_at_key(created_at):
+    seconds, _, fraction = created_at.rstrip("Z").partition(".")
+    return f"{seconds}.{fraction[:6].ljust(6, '0')}"
+
+def load_high_water_mark():
+    if not os.path.exists(HIGH_WATER_MARK_PATH):
+        return None
+    with open(HIGH_WATER_MARK_PATH, "r") as f:
+        return json.load(f).get("createdAt")
+
+def save_high_water_mark(created_at):
+    tmp_path = HIGH_WATER_MARK_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"createdAt": created_at}, f)
+    os.replace(tmp_path, HIGH_WATER_MARK_PATH)
+
+# Stream vault accounts page by page, fetching the next page in the background
+def iter_vault_accounts(fireblocks, page_size=VAULT_PAGE_SIZE):
+    def fetch(after):
+        return fireblocks.get_vault_accounts_with_page_info(
+            PagedVaultAccountsRequestFilters(limit=page_size, after=after)
+        )
+
+    with ThreadPoolExecutor(max_workers=1) as prefetch:
+        page = fetch(None)
+        while True:
+            after = (page.get("paging") or {}).get("after")
+            next_page = prefetch.submit(fetch, after) if after else None
+            yield from page.get("accounts", [])
+            if next_page is None:
+                return
+            page = next_page.result()
+
+# Function to stream deposit addresses created after `since` (a createdAt
+# value); defaults to the stored high-water mark, or the last 24 hours
+def get_recent_deposit_addresses(fireblocks, since=None):
+    if since is None:
+        since = load_high_water_mark()
+    if since is None:
+        cutoff_time = datetime.utcnow() - timedelta(hours=INITIAL_LOOKBACK_HOURS)
+        since = cutoff_time.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    since_key = created_at_key(since)
+
+    for account in iter_vault_accounts(fireblocks):
+        for asset in account.get("assets", []):
             for address_info in asset.get("addresses", []):
-                created_time = datetime.strptime(address_info["createdAt"], "%Y-%m-%dT%H:%M:%S.%fZ")
-                if created_time >= cutoff_time:
-                    recent_deposit_addresses.append(
-                        {
-                            "vault_account_id": account["id"],
-                            "asset_id": asset["id"],
-                            "address": address_info["address"]
-                        }
-                    )
-    return recent_deposit_addresses
-
-# Function to create deposit_front and quarantine addresses for each deposit address
-def create_new_addresses(fireblocks, deposit_addresses):
-    for deposit in deposit_addresses:
-        vault_account_id = deposit["vault_account_id"]
-        asset_id = deposit["asset_id"]
-
-        # Create "deposit_front" address
-        deposit_front_address = fireblocks.generate_new_address(vault_account_id, asset_id, "deposit_front")
-        print(f"Created deposit_front address: {deposit_front_address['address']} for vault {vault_account_id} and asset {asset_id}")
-
-        # Create "quarantine" address
-        quarantine_address = fireblocks.generate_new_address(vault_account_id, asset_id, "quarantine")
-        print(f"Created quarantine address: {quarantine_address['address']} for vault {vault_account_id} and asset {asset_id}")
+                created_at = address_info["createdAt"]
+                if created_at_key(created_at) > since_key:
+                    yield {
+                        "vault_account_id": account["id"],
+                        "asset_id": asset["id"],
+                        "address": address_info["address"],
+                        "created_at": created_at
+                    }
+
+# Read the journal of earlier runs: {(vault, asset, tag): address} for
+# every address that was created or found to exist already
+def load_journal(path=PROVISION_JOURNAL_PATH):
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # torn last line of an interrupted run
+            if entry.get("status") in ("created", "exists"):
+                done[(entry["vault_account_id"], entry["asset_id"], entry["tag"])] = entry["address"]
+    return done
+
+# Function to index the tagged addresses a vault wallet already has: {tag: address}
+def get_tagged_addresses(fireblocks, limiter, vault_account_id, asset_id):
+    tagged = {}
+    for address_info in call(limiter, fireblocks.get_deposit_addresses, vault_account_id, asset_id):
+        tag = address_label(address_info)
+        if tag in ADDRESS_TAGS and tag not in tagged:
+            tagged[tag] = address_info["address"]
+    return tagged
+
+# Function to create the `missing` tagged addresses of one vault wallet
+def provision_wallet(fireblocks, limiter, vault_account_id, asset_id, missing):
+    existing = get_tagged_addresses(fireblocks, limiter, vault_account_id, asset_id)
+    entries = []
+    for tag in missing:
+        entry = {"vault_account_id": vault_account_id, "asset_id": asset_id, "tag": tag}
+        if tag in existing:
+            entry.update(status="exists", address=existing[tag])
+        else:
+            try:
+                created = call(limiter, fireblocks.generate_new_address, vault_account_id, asset_id, tag)
+                entry.update(status="created", address=created["address"])
+            except Exception as e:
+                entry.update(status="failed", error=str(e))
+        entries.append(entry)
+    return entries
+
+# Function to create deposit_front and quarantine addresses for each deposit address.
+# Wallets are handled once each, on a bounded pool, and only missing addresses are
+# generated, so the function can be re-run on the same input safely.
+def create_new_addresses(fireblocks, deposit_addresses, concurrency=PROVISION_CONCURRENCY,
+                         journal_path=PROVISION_JOURNAL_PATH):
+    done = load_journal(journal_path)
+    limiter = RateLimiter(FIREBLOCKS_RATE_LIMIT)
+    counts = {"created": 0, "exists": 0, "failed": 0}
+    seen = set()
+
+    def wallets():
+        for deposit in deposit_addresses:
+            wallet = (deposit["vault_account_id"], deposit["asset_id"])
+            if wallet in seen:
+                continue
+            seen.add(wallet)
+            missing = [tag for tag in ADDRESS_TAGS if wallet + (tag,) not in done]
+            if missing:
+                yield wallet + (missing,)
+
+    def provision(item):
+        return provision_wallet(fireblocks, limiter, *item)
+
+    with open(journal_path, "a") as journal:
+        for (vault_account_id, asset_id, missing), entries, error in bounded_map(provision, wallets(), concurrency):
+            if error is not None:
+                entries = [
+                    {"vault_account_id": vault_account_id, "asset_id": asset_id, "tag": tag,
+                     "status": "failed", "error": str(error)}
+                    for tag in missing
+                ]
+            for entry in entries:
+                journal.write(json.dumps(entry) + "\n")
+                counts[entry["status"]] += 1
+                if entry["status"] == "created":
+                    print(f"Created {entry['tag']} address: {entry['address']} for vault {vault_account_id} and asset {asset_id}")
+                elif entry["status"] == "exists":
+                    print(f"Found existing {entry['tag']} address: {entry['address']} for vault {vault_account_id} and asset {asset_id}")
+                else:
+                    print(f"Failed to create {entry['tag']} address for vault {vault_account_id} and asset {asset_id}: {entry['error']}")
+            journal.flush()
+    return counts
 
 
 def main():
     fireblocks = get_fireblocks_sdk()
 
-    print("Fetching recent deposit addresses...")
-    deposit_addresses = get_recent_deposit_addresses(fireblocks)
+    print("Fetching new deposit addresses...")
+    run_start = datetime.utcnow()
+    newest = {"createdAt": None, "key": ""}
+    found = 0
+
+    def track(deposit_addresses):
+        nonlocal found
+        for deposit in deposit_addresses:
+            found += 1
+            key = created_at_key(deposit["created_at"])
+            if key > newest["key"]:
+                newest.update(createdAt=deposit["created_at"], key=key)
+            yield deposit
+
+    # Addresses are handled as soon as their page arrives.
+    counts = create_new_addresses(fireblocks, track(get_recent_deposit_addresses(fireblocks)))
+
+    if not found:
+        print("No new deposit addresses found since the last run.")
+        return
 
-    if not deposit_addresses:
-        print("No new deposit addresses found in the past 24 hours.")
+    print(f"Provisioning: {counts['created']} created, {counts['exists']} already present, {counts['failed']} failed.")
+    if counts["failed"]:
+        print(f"Some addresses could not be created; run again to retry them (see {PROVISION_JOURNAL_PATH}).")
         return
 
-    print(f"Found {len(deposit_addresses)} new deposit addresses. Creating corresponding addresses...")
-    create_new_addresses(fireblocks, deposit_addresses)
+    # Only move the mark once every address up to it has been handled. An
+    # address can appear in a vault page that was already read while later
+    # pages carry newer ones, so the mark stays a little behind the run
+    # start; addresses seen twice are skipped via the journal.
+    limit = (run_start - timedelta(seconds=HIGH_WATER_MARK_SLACK_SECONDS)).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    mark = min(newest["createdAt"], limit, key=created_at_key)
+    save_high_water_mark(mark)
+    print(f"Handled {found} new deposit addresses; high-water mark is now {mark}.")
 
 if __name__ == "__main__":
     main()
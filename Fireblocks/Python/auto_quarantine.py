@@ -0,0 +1,315 @@
+"""
+----------------------------------------------------------------------------
+ Web3Firewall™ - Blockchain Risk & Compliance Intelligence Platform
+----------------------------------------------------------------------------
+
+ Title     : Verdict-Driven Automatic Quarantine (Monitor ➔ Fireblocks)
+ Version   : 1.0
+ Language  : Python 3.x
+ Author    : Web3Firewall Engineering Team
+ License   : Proprietary - Web3Firewall™ All Rights Reserved
+
+ Description:
+ Runs the Web3Firewall monitor (web3firewall/python/monitor.py) and, as
+ soon as a watched deposit address receives a DENY or NEEDSAPPROVAL
+ verdict, moves that vault wallet's available balance to its quarantine
+ address with the sweep logic of mv_funds_deposit_quarantine.py.
+
+ - deposit address -> vault/asset comes from the shared vault address index;
+   addresses created since it was built are found by re-indexing the vaults
+ - verdicts are queued and swept by a small pool of worker threads, which
+   also resolve the address (a miss can re-index every vault)
+ - hits on a wallet that is already queued are coalesced into that sweep;
+   hits arriving while it is being swept trigger exactly one more sweep
+ - a sweep that finds less than the flagged deposit (not credited yet) is
+   retried every CREDIT_RETRY_INTERVAL seconds; after CREDIT_WAIT the
+   wallet is reported as not_credited
+ - sweep transactions are followed to their final status (tx_tracker.py)
+ - verdicts from check_broadcasted_evm_txn.evaluate_transaction in the same
+   process are routed the same way, by the event's `data.to`
+
+ Usage (same arguments as monitor.py, single process only):
+     python auto_quarantine.py --watchlist deposit_addresses.txt 1 --follow --state monitor.sqlite
+
+ Fireblocks credentials and tags are configured in
+ mv_funds_deposit_quarantine.py; Web3Firewall and Etherscan settings in
+ monitor.py.
+
+ Disclaimer:
+ Usage of this script is provided "AS IS" without warranty of any kind.
+ Web3Firewall™, its affiliates, and contributors accept no liability
+ for any damages, data loss, financial exposure, or regulatory breaches
+ arising from the use, misuse, or inability to use this code.
+
+ You are solely responsible for reviewing, testing, and ensuring
+ that this code meets your compliance, security, and operational needs.
+
+----------------------------------------------------------------------------
+ (C) 2025 Web3Firewall™. All Rights Reserved.
+ https://web3firewall.ai
+----------------------------------------------------------------------------
+"""
+
+import os
+import queue
+import sys
+import threading
+import time
+from decimal import Decimal
+
+WEB3FIREWALL_PYTHON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                       "..", "..", "web3firewall", "python")
+sys.path.insert(0, os.path.normpath(WEB3FIREWALL_PYTHON_DIR))
+
+import check_broadcasted_evm_txn
+import monitor
+from mv_funds_deposit_quarantine import (TX_TRACKER_PATH, get_fireblocks_sdk, get_vault_index,
+                                         print_transition, sweep_wallet)
+from tx_tracker import TransactionTracker
+
+# CONFIG
+TRIGGER_ACTIONS = ("deny", "needsapproval")  # verdicts that quarantine the wallet
+SOURCE_TAG = "deposit"
+DESTINATION_TAG = "quarantine"
+QUARANTINE_CONCURRENCY = 4  # wallets swept in parallel
+TRACK_SWEEPS = True         # follow sweep transactions to COMPLETED/FAILED (history in TX_TRACKER_PATH)
+CREDIT_WAIT = 300           # seconds a wallet is re-swept while a flagged deposit is still being credited
+CREDIT_RETRY_INTERVAL = 10  # seconds between those sweeps
+NATIVE_ASSETS = ("ETH", "ETH_TEST5", "ETH_TEST6")  # Fireblocks assets paid by a transaction's value
+NATIVE_DECIMALS = 18
+
+# How much of `asset_id` a flagged transaction should credit to the wallet:
+# its value for the native asset, 0 (any amount) for a token wallet hit by
+# a contract call, or None when no credit is expected.
+def expected_credit(asset_id, value=None, input_data=None):
+    if asset_id in NATIVE_ASSETS:
+        try:
+            wei = int(value, 0) if isinstance(value, str) and value.startswith("0x") else int(value or 0)
+        except ValueError:
+            return None
+        return Decimal(wei) / 10 ** NATIVE_DECIMALS if wei else None
+    if input_data and input_data != "0x":
+        return Decimal(0)
+    return None
+
+class QuarantineDispatcher:
+    def __init__(self, fireblocks, concurrency=QUARANTINE_CONCURRENCY, source_tag=SOURCE_TAG,
+                 destination_tag=DESTINATION_TAG, on_result=None, credit_wait=CREDIT_WAIT,
+                 retry_interval=CREDIT_RETRY_INTERVAL):
+        self.fireblocks = fireblocks
+        self.index = get_vault_index(fireblocks)
+        self.source_tag = source_tag
+        self.destination_tag = destination_tag
+        self.on_result = on_result
+        self.credit_wait = credit_wait
+        self.retry_interval = retry_interval
+        self.queue = queue.Queue()
+        self.state = {}      # (vault_id, asset_id) -> "queued" | "running" | "rerun"
+        self.awaiting = {}   # (vault_id, asset_id) -> {"amount": Decimal still to arrive, "deadline": monotonic}
+        self.timers = {}     # (vault_id, asset_id) -> threading.Timer of the next credit retry
+        self.lock = threading.Lock()
+        self.counts = {"hits": 0, "coalesced": 0, "unknown": 0}
+        self.workers = [threading.Thread(target=self._work, daemon=True) for _ in range(concurrency)]
+        for worker in self.workers:
+            worker.start()
+
+    def handle_verdict(self, address, response, value=None, input_data=None):
+        """
+        Queue a sweep of every wallet behind `address` if `response` calls for
+        quarantine. `value` and `input_data` of the flagged transaction tell
+        how much the sweep should find; the address is resolved by a worker.
+        """
+        action = str(response.get("actionToTake", "")).lower()
+        if action not in TRIGGER_ACTIONS or not address:
+            return False
+        with self.lock:
+            self.counts["hits"] += 1
+        self.queue.put(("hit", address, action, value, input_data))
+        return True
+
+    def on_monitor_verdict(self, tx, response):
+        """monitor.add_verdict_listener() hook."""
+        self.handle_verdict(tx.get("watched") or tx.get("to"), response, tx.get("value"), tx.get("input"))
+
+    def on_event_verdict(self, event, response):
+        """check_broadcasted_evm_txn.add_verdict_listener() hook; the payee is `data.to`."""
+        data = event.get("data") or {}
+        self.handle_verdict((data.get("to") or "").lower(), response, data.get("value"), data.get("data"))
+
+    def _resolve(self, address, action, value, input_data):
+        # May re-index every vault, so it runs here rather than on the caller's thread.
+        try:
+            found = self.index.lookup_address(address)
+        except Exception as e:
+            print(f"[Quarantine] {action.upper()} for {address}, but the vault lookup failed: {e}")
+            with self.lock:
+                self.counts["lookup_failed"] = self.counts.get("lookup_failed", 0) + 1
+            return
+        wallets = [(vault_id, asset_id) for vault_id, asset_id, tag in found if tag == self.source_tag]
+        if not wallets:
+            with self.lock:
+                self.counts["unknown"] += 1
+            print(f"[Quarantine] {action.upper()} for {address}, which is not a known "
+                  f"{self.source_tag} address; nothing to move.")
+            return
+        for wallet in wallets:
+            amount = expected_credit(wallet[1], value, input_data)
+            if amount is not None:
+                with self.lock:
+                    awaiting = self.awaiting.setdefault(wallet, {"amount": Decimal(0)})
+                    awaiting["amount"] += amount
+                    awaiting["deadline"] = time.monotonic() + self.credit_wait
+            # The verdict means funds just arrived, so a cached balance is stale.
+            self.index.invalidate_balance(*wallet)
+            self._enqueue(wallet, address, action)
+
+    def _enqueue(self, wallet, address, action):
+        with self.lock:
+            state = self.state.get(wallet)
+            if state in ("queued", "rerun"):
+                self.counts["coalesced"] += 1
+                return
+            if state == "running":
+                # Funds may have arrived after the running sweep read the balance.
+                self.state[wallet] = "rerun"
+                return
+            self.state[wallet] = "queued"
+            timer = self.timers.pop(wallet, None)
+        if timer:
+            timer.cancel()
+        print(f"[Quarantine] {action.upper()} for {address}: queueing vault {wallet[0]} {wallet[1]}")
+        self.queue.put(("sweep", wallet))
+
+    def _retry(self, wallet):
+        with self.lock:
+            self.timers.pop(wallet, None)
+            if wallet in self.state:
+                return
+            self.state[wallet] = "queued"
+        self.index.invalidate_balance(*wallet)
+        self.queue.put(("sweep", wallet))
+
+    def _settle(self, wallet, result):
+        """
+        Count what a sweep moved against the credit still expected and return
+        the results to report. A wallet whose flagged deposit has not fully
+        arrived is swept again after `retry_interval` (an empty sweep is not
+        reported meanwhile) and reported as not_credited once its deadline
+        has passed.
+        """
+        reports = [result] if result["status"] != "empty" else []
+        with self.lock:
+            awaiting = self.awaiting.get(wallet)
+            if awaiting is None or result["status"] not in ("moved", "empty"):
+                self.awaiting.pop(wallet, None)
+                return [result]
+            if result["status"] == "moved":
+                awaiting["amount"] -= Decimal(result["amount"])
+                if awaiting["amount"] <= 0:
+                    del self.awaiting[wallet]
+                    return reports
+            if time.monotonic() >= awaiting["deadline"]:
+                del self.awaiting[wallet]
+                return reports + [{"vault_account_id": wallet[0], "asset_id": wallet[1], "status": "not_credited",
+                                   "missing": format(awaiting["amount"], "f") if awaiting["amount"] > 0 else None}]
+            if self.state.get(wallet) != "rerun":
+                timer = threading.Timer(self.retry_interval, self._retry, (wallet,))
+                timer.daemon = True
+                self.timers[wallet] = timer
+                timer.start()
+        return reports
+
+    def _work(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                return
+            if item[0] == "hit":
+                self._resolve(*item[1:])
+                self.queue.task_done()
+                continue
+            wallet = item[1]
+            with self.lock:
+                self.state[wallet] = "running"
+            try:
+                result = sweep_wallet(self.fireblocks, wallet[0], wallet[1],
+                                      self.source_tag, self.destination_tag)
+            except Exception as e:
+                result = {"vault_account_id": wallet[0], "asset_id": wallet[1],
+                          "status": "failed", "error": str(e)}
+            for report in self._settle(wallet, result):
+                self._report(report)
+            with self.lock:
+                if self.state.pop(wallet) == "rerun":
+                    self.state[wallet] = "queued"
+                    self.index.invalidate_balance(*wallet)
+                    self.queue.put(("sweep", wallet))
+            self.queue.task_done()
+
+    def _report(self, result):
+        line = f"[Quarantine] vault {result['vault_account_id']} {result['asset_id']}: {result['status']}"
+        if result["status"] == "moved":
+            line += f" {result['amount']} (TX ID: {result['tx_id']}, Status: {result['tx_status']})"
+        elif result["status"] == "failed":
+            line += f" - {result['error']}"
+        elif result["status"] == "not_credited":
+            line += (f" - flagged deposit ({result['missing'] or 'any amount'} still missing) "
+                     f"not credited within {self.credit_wait}s")
+        print(line, flush=True)
+        with self.lock:
+            self.counts[result["status"]] = self.counts.get(result["status"], 0) + 1
+        if self.on_result:
+            self.on_result(result)
+
+    def close(self):
+        """Wait for every queued sweep to finish and stop the workers; pending credit retries are dropped."""
+        self.queue.join()
+        with self.lock:
+            timers = list(self.timers.values())
+            self.timers.clear()
+            waiting = len(self.awaiting)
+        for timer in timers:
+            timer.cancel()
+        if waiting:
+            print(f"[Quarantine] stopped while {waiting} wallet(s) still waited for a flagged deposit.")
+        for _ in self.workers:
+            self.queue.put(None)
+        for worker in self.workers:
+            worker.join()
+
+def main(argv=None):
+    args = monitor.parse_args(argv)
+    if args.workers != 1:
+        # Worker processes would each need their own queue and Fireblocks client.
+        print("auto_quarantine.py runs the monitor in a single process; ignoring --workers.")
+        args.workers = 1
+
+    fireblocks = get_fireblocks_sdk()
+    tracker = None
+    on_result = None
+    if TRACK_SWEEPS:
+        tracker = TransactionTracker(fireblocks, TX_TRACKER_PATH, limiter=get_vault_index(fireblocks).limiter,
+                                     on_change=print_transition).start()
+
+        def on_result(result):
+            if result["status"] == "moved":
+                tracker.track(result["tx_id"], result["tx_status"],
+                              context={key: value for key, value in result.items() if key != "tx"})
+
+    dispatcher = QuarantineDispatcher(fireblocks, on_result=on_result)
+    monitor.add_verdict_listener(dispatcher.on_monitor_verdict)
+    check_broadcasted_evm_txn.add_verdict_listener(dispatcher.on_event_verdict)
+    try:
+        monitor.run(args)
+    finally:
+        print("Waiting for queued quarantine sweeps to finish...")
+        dispatcher.close()
+        print("[Quarantine] " + ", ".join(f"{count} {name}" for name, count in sorted(dispatcher.counts.items())))
+        if tracker:
+            # Still-open transactions are picked up again on the next start.
+            print(f"[Quarantine] {tracker.open_count()} sweep transaction(s) still in flight.")
+            tracker.close()
+
+if __name__ == "__main__":
+    main()
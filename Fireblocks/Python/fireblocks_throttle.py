@@ -0,0 +1,101 @@
+"""
+----------------------------------------------------------------------------
+ Web3Firewall™ - Blockchain Risk & Compliance Intelligence Platform
+----------------------------------------------------------------------------
+
+ Title     : Fireblocks API Pacing Helpers
+ Version   : 1.0
+ Language  : Python 3.x
+ Author    : Web3Firewall Engineering Team
+ License   : Proprietary - Web3Firewall™ All Rights Reserved
+
+ Description:
+ Shared by the Fireblocks scripts that make many API calls at once:
+ - RateLimiter spaces calls out across all worker threads
+ - call() retries requests Fireblocks rejected with a rate-limit reply
+ - bounded_map() runs a function over a stream of items on a bounded
+   thread pool and yields the outcomes as they finish
+
+ Only rate-limited requests are retried. Fireblocks rejected those
+ before acting on them, whereas a timed-out create call may already
+ have gone through.
+
+----------------------------------------------------------------------------
+ (C) 2025 Web3Firewall™. All Rights Reserved.
+ https://web3firewall.ai
+----------------------------------------------------------------------------
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from fireblocks_sdk import FireblocksApiException
+
+DEFAULT_RATE = 5        # requests per second, shared by all threads of a script
+MAX_RETRIES = 5         # retries of a rate-limited request
+BACKOFF = 1.0           # seconds, base of the exponential backoff
+
+class RateLimiter:
+    def __init__(self, rate=DEFAULT_RATE):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """Block until the next request slot."""
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def back_off(self, seconds):
+        """Hold every caller back for `seconds` after a rate-limit reply."""
+        with self.lock:
+            self.next_slot = max(self.next_slot, time.monotonic() + seconds)
+
+def is_rate_limited(error):
+    # The SDK only passes on the response body, not the HTTP status.
+    text = str(error).lower()
+    return "429" in text or "too many requests" in text or "rate limit" in text
+
+def call(limiter, fn, *args, **kwargs):
+    """Call an SDK method through `limiter`, retrying rate-limited requests."""
+    attempt = 0
+    while True:
+        limiter.wait()
+        try:
+            return fn(*args, **kwargs)
+        except FireblocksApiException as e:
+            if not is_rate_limited(e) or attempt >= MAX_RETRIES:
+                raise
+            limiter.back_off(random.uniform(BACKOFF, BACKOFF * 2 ** attempt))
+            attempt += 1
+
+def bounded_map(fn, items, concurrency):
+    """
+    Run `fn(item)` for every item with at most `concurrency` calls running.
+
+    `items` may be a generator; it is only read as fast as the workers
+    keep up. Yields `(item, result, error)` in completion order, with
+    `error` set to the raised exception when a call failed.
+    """
+    def outcome(item, future):
+        error = future.exception()
+        return item, (None if error else future.result()), error
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        pending = {}
+        for item in items:
+            pending[pool.submit(fn, item)] = item
+            if len(pending) >= 2 * concurrency:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield outcome(pending.pop(future), future)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield outcome(pending.pop(future), future)
@@ -29,66 +29,232 @@
 ----------------------------------------------------------------------------
 """
 
-from fireblocks_sdk import FireblocksSDK, TransferPeerPath, TransactionArguments
+from fireblocks_sdk import (FireblocksSDK, DestinationTransferPeerPath, TransferPeerPath, ONE_TIME_ADDRESS,
+                            TRANSACTION_TRANSFER, VAULT_ACCOUNT)
+import argparse
+import json
 import os
+import sys
+import threading
 from datetime import datetime
 
+from fireblocks_throttle import RateLimiter, bounded_map, call
+from tx_tracker import TransactionTracker
+from vault_address_index import VaultAddressIndex
+
 # CONFIG
 API_SECRET_PATH = "path_to_your_private_key.pem"
 API_KEY = "your_fireblocks_api_key_here"
 VAULT_ACCOUNT_ID = "123456"  # Replace with your Fireblocks Vault account ID
 ASSET_ID = "ETH"             # Replace with your desired asset, e.g., "ETH", "USDC"
+VAULT_INDEX_PATH = "vault_address_index.json"  # Addresses kept between runs (None to disable)
+FIREBLOCKS_RATE_LIMIT = 5    # Fireblocks requests per second
+SWEEP_CONCURRENCY = 8        # Vault/asset pairs swept in parallel in bulk mode
+TX_TRACKER_PATH = "sweep_transactions.sqlite"  # Status history of sweep transactions (--wait)
+WAIT_TIMEOUT = 1800          # Seconds --wait follows transactions before giving up
+
+# One address index per process, shared by every sweep
+_vault_index = None
+_vault_index_lock = threading.Lock()
 
 def get_fireblocks_sdk():
     with open(API_SECRET_PATH, "r") as key_file:
         private_key = key_file.read()
     return FireblocksSDK(private_key, API_KEY)
 
+# Return the shared address index, filling it with one pass over all vaults
+# (or from VAULT_INDEX_PATH) the first time it is needed
+def get_vault_index(fireblocks):
+    global _vault_index
+    with _vault_index_lock:
+        if _vault_index is None:
+            index = VaultAddressIndex(
+                fireblocks, path=VAULT_INDEX_PATH, limiter=RateLimiter(FIREBLOCKS_RATE_LIMIT)
+            )
+            if not index.load():
+                index.refresh()
+            _vault_index = index
+    return _vault_index
+
 def get_address_by_tag(fireblocks, vault_id, asset_id, tag):
-    vault_accounts = fireblocks.get_vault_accounts(vault_id)
-    for asset in vault_accounts.get("assets", []):
-        if asset["id"] == asset_id:
-            for address_info in asset.get("addressInfos", []):
-                if address_info.get("tag") == tag:
-                    return address_info.get("address")
-    return None
+    return get_vault_index(fireblocks).get_address(vault_id, asset_id, tag)
 
 def get_available_balance(fireblocks, vault_id, asset_id, address):
-    balance = fireblocks.get_vault_account_asset(vault_id, asset_id)
-    return balance.get("available"), balance.get("total")
+    return get_vault_index(fireblocks).get_available_balance(vault_id, asset_id)
+
+# Move the available balance of one vault wallet from `source_tag` to
+# `destination_tag`. Returns a result dict; API errors are raised.
+def sweep_wallet(fireblocks, vault_id, asset_id, source_tag, destination_tag):
+    index = get_vault_index(fireblocks)
+    result = {"vault_account_id": vault_id, "asset_id": asset_id}
 
-def move_funds(fireblocks, vault_id, asset_id, source_tag, destination_tag):
-    # Get addresses
     from_address = get_address_by_tag(fireblocks, vault_id, asset_id, source_tag)
     to_address = get_address_by_tag(fireblocks, vault_id, asset_id, destination_tag)
-
     if not from_address or not to_address:
-        print(f"Missing address: deposit={from_address}, quarantine={to_address}")
-        return
+        result.update(status="missing_address", from_address=from_address, to_address=to_address)
+        return result
 
     available_balance, _ = get_available_balance(fireblocks, vault_id, asset_id, from_address)
-    if float(available_balance) <= 0:
-        print("No available funds to transfer.")
-        return
+    if float(available_balance or 0) <= 0:
+        result.update(status="empty")
+        return result
 
-    # Create transfer
-    tx = fireblocks.create_transaction(
+    # Create transfer. The SDK has no source/destination address arguments:
+    # the quarantine address is paid as a one-time address and the deposit
+    # address to spend from is passed in extraParameters.
+    tx = call(
+        index.limiter,
+        fireblocks.create_transaction,
         asset_id=asset_id,
-        source=TransferPeerPath(vault_account_id=vault_id),
-        destination=TransferPeerPath(vault_account_id=vault_id),
+        source=TransferPeerPath(VAULT_ACCOUNT, vault_id),
+        destination=DestinationTransferPeerPath(ONE_TIME_ADDRESS, one_time_address={"address": to_address}),
         amount=str(available_balance),
         note=f"Auto-transfer to quarantine on {datetime.utcnow().isoformat()}",
-        tx_type="INTERNAL",
-        source_address=from_address,
-        destination_address=to_address,
-        extra_parameters=TransactionArguments()
+        tx_type=TRANSACTION_TRANSFER,
+        extra_parameters={"sourceAddress": from_address}
+    )
+
+    index.record_transfer(vault_id, asset_id, available_balance)
+    result.update(status="moved", amount=str(available_balance), tx_id=tx["id"],
+                  tx_status=tx["status"], tx=tx)
+    return result
+
+def move_funds(fireblocks, vault_id, asset_id, source_tag, destination_tag):
+    result = sweep_wallet(fireblocks, vault_id, asset_id, source_tag, destination_tag)
+    if result["status"] == "missing_address":
+        print(f"Missing address: deposit={result['from_address']}, quarantine={result['to_address']}")
+        return None
+    if result["status"] == "empty":
+        print("No available funds to transfer.")
+        return None
+    print(f"Transfer initiated. TX ID: {result['tx_id']}, Status: {result['tx_status']}")
+    return result["tx"]
+
+# Sweep many (vault_id, asset_id) pairs with at most `concurrency` in flight.
+# Yields one result dict per pair as soon as it is done, failures included.
+def sweep_wallets(fireblocks, wallets, source_tag="deposit", destination_tag="quarantine",
+                  concurrency=SWEEP_CONCURRENCY):
+    get_vault_index(fireblocks)  # fill the index once, before the workers start
+
+    def sweep(wallet):
+        return sweep_wallet(fireblocks, wallet[0], wallet[1], source_tag, destination_tag)
+
+    for (vault_id, asset_id), result, error in bounded_map(sweep, wallets, concurrency):
+        if error is not None:
+            result = {"vault_account_id": vault_id, "asset_id": asset_id,
+                      "status": "failed", "error": str(error)}
+        yield result
+
+# Read "vault_id asset_id" (or "vault_id,asset_id") lines; "-" reads stdin
+def read_wallet_list(path):
+    f = sys.stdin if path == "-" else open(path, "r")
+    try:
+        for line in f:
+            line = line.split("#", 1)[0].replace(",", " ").split()
+            if len(line) == 2:
+                yield line[0], line[1]
+            elif line:
+                print(f"Skipping malformed line: {' '.join(line)}", file=sys.stderr)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+# All indexed wallets that have both tagged addresses, optionally for one asset
+def query_wallets(fireblocks, source_tag, destination_tag, asset_id=None):
+    index = get_vault_index(fireblocks)
+    destinations = set(index.wallets_with_tag(destination_tag))
+    return sorted(
+        wallet for wallet in index.wallets_with_tag(source_tag)
+        if wallet in destinations and (asset_id is None or wallet[1] == asset_id)
+    )
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Move deposit balances to quarantine addresses in Fireblocks."
     )
+    selection = parser.add_mutually_exclusive_group()
+    selection.add_argument("--wallets", metavar="FILE",
+                           help="sweep the vault/asset pairs listed in FILE ('-' for stdin)")
+    selection.add_argument("--all", action="store_true",
+                           help="sweep every vault/asset pair that has both tagged addresses")
+    parser.add_argument("--asset", help="with --all, only sweep this asset")
+    parser.add_argument("--source-tag", default="deposit")
+    parser.add_argument("--destination-tag", default="quarantine")
+    parser.add_argument("--concurrency", type=int, default=SWEEP_CONCURRENCY,
+                        help=f"pairs swept in parallel (default: {SWEEP_CONCURRENCY})")
+    parser.add_argument("--results", metavar="FILE",
+                        help="append one JSON line per swept pair to FILE")
+    parser.add_argument("--wait", action="store_true",
+                        help="follow the created transactions until they reach a final status")
+    return parser.parse_args(argv)
 
-    print(f"Transfer initiated. TX ID: {tx['id']}, Status: {tx['status']}")
+def print_transition(tx_id, old_status, new_status, tx):
+    print(f"TX {tx_id}: {old_status or 'NEW'} -> {new_status}", flush=True)
 
-def main():
+# Follow every tracked transaction to a final status and print the outcome
+def wait_for_transactions(tracker, tx_ids):
+    if not tx_ids:
+        return
+    print(f"Waiting for {len(tx_ids)} transaction(s) to complete...")
+    final = tracker.wait_all(tx_ids, timeout=WAIT_TIMEOUT)
+    counts = {}
+    for status in final.values():
+        counts[status or "PENDING"] = counts.get(status or "PENDING", 0) + 1
+    print("Transactions: " + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
+
+def main(argv=None):
+    args = parse_args(argv)
     fireblocks = get_fireblocks_sdk()
-    move_funds(fireblocks, VAULT_ACCOUNT_ID, ASSET_ID, "deposit", "quarantine")
+    tracker = None
+    tx_ids = []
+    if args.wait:
+        tracker = TransactionTracker(fireblocks, TX_TRACKER_PATH, limiter=get_vault_index(fireblocks).limiter,
+                                     on_change=print_transition).start()
+
+    if not args.wallets and not args.all:
+        tx = move_funds(fireblocks, VAULT_ACCOUNT_ID, ASSET_ID, args.source_tag, args.destination_tag)
+        if tracker:
+            if tx:
+                tracker.track(tx["id"], tx["status"])
+                wait_for_transactions(tracker, [tx["id"]])
+            tracker.close()
+        return
+
+    if args.all:
+        wallets = query_wallets(fireblocks, args.source_tag, args.destination_tag, args.asset)
+        print(f"Sweeping {len(wallets)} vault/asset pairs...")
+    else:
+        wallets = read_wallet_list(args.wallets)
+
+    counts = {}
+    results = open(args.results, "a") if args.results else None
+    try:
+        for done, result in enumerate(
+            sweep_wallets(fireblocks, wallets, args.source_tag, args.destination_tag,
+                          max(1, args.concurrency)), 1
+        ):
+            result.pop("tx", None)
+            if tracker and result["status"] == "moved":
+                tracker.track(result["tx_id"], result["tx_status"], context=result)
+                tx_ids.append(result["tx_id"])
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+            line = f"[{done}] vault {result['vault_account_id']} {result['asset_id']}: {result['status']}"
+            if result["status"] == "moved":
+                line += f" {result['amount']} (TX ID: {result['tx_id']}, Status: {result['tx_status']})"
+            elif result["status"] == "failed":
+                line += f" - {result['error']}"
+            print(line, flush=True)
+            if results:
+                results.write(json.dumps(result) + "\n")
+                results.flush()
+    finally:
+        if results:
+            results.close()
+
+    print("Sweep finished: " + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
+    if tracker:
+        wait_for_transactions(tracker, tx_ids)
+        tracker.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,323 @@
+"""
+----------------------------------------------------------------------------
+ Web3Firewall™ - Blockchain Risk & Compliance Intelligence Platform
+----------------------------------------------------------------------------
+
+ Title     : Fireblocks Transaction Status Tracker
+ Version   : 1.0
+ Language  : Python 3.x
+ Author    : Web3Firewall Engineering Team
+ License   : Proprietary - Web3Firewall™ All Rights Reserved
+
+ Description:
+ Follows many in-flight Fireblocks transactions (e.g. quarantine sweeps)
+ until they reach a final status.
+ - one poller thread for all tracked transactions: every round lists the
+   transactions created since the oldest open one with get_transactions()
+   (LIST_LIMIT per call, at most MAX_LIST_PAGES calls), and only looks up
+   the few that listing did not return with get_transaction_by_id()
+ - the poll interval starts at MIN_POLL_INTERVAL and backs off to
+   MAX_POLL_INTERVAL while nothing changes
+ - optional webhook receiver feeding the same tracker (Fireblocks
+   TRANSACTION_CREATED / TRANSACTION_STATUS_UPDATED events); it listens on
+   localhost and only accepts signed events by default
+ - every status transition is stored in SQLite; open transactions are
+   picked up again after a restart
+ - callers can wait() for one or many transactions, or register a
+   callback for every transition
+
+----------------------------------------------------------------------------
+ (C) 2025 Web3Firewall™. All Rights Reserved.
+ https://web3firewall.ai
+----------------------------------------------------------------------------
+"""
+
+import base64
+import json
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fireblocks_throttle import call
+
+FINAL_STATUSES = frozenset({"COMPLETED", "FAILED", "CANCELLED", "REJECTED", "BLOCKED"})
+MIN_POLL_INTERVAL = 2       # seconds, used right after something changed
+MAX_POLL_INTERVAL = 30      # seconds, reached while nothing changes
+BACKOFF_FACTOR = 1.5
+LIST_LIMIT = 500            # transactions per get_transactions() call (Fireblocks maximum)
+MAX_LIST_PAGES = 10         # get_transactions() calls per polling round
+SINGLE_LOOKUPS_PER_ROUND = 20   # get_transaction_by_id() calls for transactions the list missed
+CREATED_AT_SLACK_MS = 60000     # clock skew allowed when a transaction's createdAt is unknown
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    tx_id       TEXT PRIMARY KEY,
+    status      TEXT,
+    sub_status  TEXT,
+    tx_hash     TEXT,
+    created_at  INTEGER NOT NULL,
+    updated_at  INTEGER NOT NULL,
+    context     TEXT
+);
+CREATE TABLE IF NOT EXISTS transitions (
+    tx_id       TEXT NOT NULL,
+    from_status TEXT,
+    to_status   TEXT NOT NULL,
+    at          INTEGER NOT NULL
+);
+"""
+
+class TransactionTracker:
+    def __init__(self, fireblocks, path=":memory:", limiter=None, on_change=None,
+                 min_interval=MIN_POLL_INTERVAL, max_interval=MAX_POLL_INTERVAL):
+        self.fireblocks = fireblocks
+        self.limiter = limiter
+        self.on_change = on_change  # on_change(tx_id, old_status, new_status, tx)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.open = {}              # tx_id -> {"status", "created_at", "checked"}
+        self.final = {}             # tx_id -> final status, for wait()
+        self.cond = threading.Condition()
+        self.db_lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        self.stopping = False
+        self.poller = None
+        self._load_open()
+
+    def _call(self, fn, *args, **kwargs):
+        if self.limiter is None:
+            return fn(*args, **kwargs)
+        return call(self.limiter, fn, *args, **kwargs)
+
+    def _load_open(self):
+        placeholders = ",".join("?" * len(FINAL_STATUSES))
+        rows = self.db.execute(
+            f"SELECT tx_id, status, created_at FROM transactions "
+            f"WHERE status IS NULL OR status NOT IN ({placeholders})", tuple(FINAL_STATUSES)
+        ).fetchall()
+        for tx_id, status, created_at in rows:
+            self.open[tx_id] = {"status": status, "created_at": created_at, "checked": 0}
+
+    def track(self, tx_id, status=None, created_at=None, context=None):
+        """
+        Start following `tx_id`, e.g. with the status create_transaction returned.
+
+        `created_at` is in milliseconds like Fireblocks' createdAt; `context`
+        is stored with the transaction as JSON.
+        """
+        if created_at is None:
+            created_at = int(time.time() * 1000) - CREATED_AT_SLACK_MS
+        with self.db_lock, self.db:
+            self.db.execute(
+                "INSERT OR IGNORE INTO transactions (tx_id, status, created_at, updated_at, context) "
+                "VALUES (?, NULL, ?, ?, ?)",
+                (tx_id, int(created_at), int(time.time()), json.dumps(context))
+            )
+        with self.cond:
+            if tx_id not in self.open and tx_id not in self.final:
+                self.open[tx_id] = {"status": None, "created_at": int(created_at), "checked": 0}
+            self.interval = self.min_interval
+            self.cond.notify_all()
+        if status:
+            self.update({"id": tx_id, "status": status})
+
+    def update(self, tx):
+        """Apply a transaction object from the API or a webhook; returns True if its status changed."""
+        tx_id = tx.get("id")
+        new_status = tx.get("status")
+        if not tx_id or not new_status:
+            return False
+        with self.cond:
+            entry = self.open.get(tx_id)
+            if entry is None or entry["status"] == new_status:
+                return False
+            old_status = entry["status"]
+            entry["status"] = new_status
+            if new_status in FINAL_STATUSES:
+                del self.open[tx_id]
+                self.final[tx_id] = new_status
+            self.cond.notify_all()
+
+        now = int(time.time())
+        with self.db_lock, self.db:
+            self.db.execute(
+                "UPDATE transactions SET status = ?, sub_status = ?, tx_hash = ?, updated_at = ? "
+                "WHERE tx_id = ?",
+                (new_status, tx.get("subStatus"), tx.get("txHash"), now, tx_id)
+            )
+            self.db.execute(
+                "INSERT INTO transitions (tx_id, from_status, to_status, at) VALUES (?, ?, ?, ?)",
+                (tx_id, old_status, new_status, now)
+            )
+        if self.on_change:
+            self.on_change(tx_id, old_status, new_status, tx)
+        return True
+
+    def poll_once(self):
+        """One polling round over every open transaction; returns the number of changes."""
+        with self.cond:
+            if not self.open:
+                return 0
+            oldest = min(entry["created_at"] for entry in self.open.values())
+        changed = 0
+        seen = set()
+        before = None
+        # Newest first; page back with `before` until the window is covered.
+        for _ in range(MAX_LIST_PAGES):
+            filters = {"after": oldest - 1, "limit": LIST_LIMIT}
+            if before is not None:
+                filters["before"] = before
+            page = self._call(self.fireblocks.get_transactions, **filters) or []
+            for tx in page:
+                seen.add(tx.get("id"))
+                changed += self.update(tx)
+            if len(page) < LIST_LIMIT:
+                break
+            # +1 keeps transactions sharing the boundary millisecond in the next page.
+            before = min(int(tx.get("createdAt", 0)) for tx in page) + 1
+
+        # Whatever the listing did not reach is looked up one by one, the
+        # ones checked longest ago first.
+        now = time.monotonic()
+        with self.cond:
+            missing = sorted(
+                (entry["checked"], tx_id) for tx_id, entry in self.open.items() if tx_id not in seen
+            )[:SINGLE_LOOKUPS_PER_ROUND]
+            for _, tx_id in missing:
+                self.open[tx_id]["checked"] = now
+        for _, tx_id in missing:
+            try:
+                changed += self.update(self._call(self.fireblocks.get_transaction_by_id, tx_id))
+            except Exception as e:
+                print(f"[Tracker] Could not fetch transaction {tx_id}: {e}")
+        return changed
+
+    def _poll_loop(self):
+        while True:
+            with self.cond:
+                while not self.stopping and not self.open:
+                    self.cond.wait()
+                if self.stopping:
+                    return
+            try:
+                changed = self.poll_once()
+            except Exception as e:
+                print(f"[Tracker] Polling failed: {e}")
+                changed = 0
+            with self.cond:
+                if changed:
+                    self.interval = self.min_interval
+                else:
+                    self.interval = min(self.max_interval, self.interval * BACKOFF_FACTOR)
+                # Status updates notify the condition too; only stop() ends the pause early.
+                deadline = time.monotonic() + self.interval
+                while not self.stopping and time.monotonic() < deadline:
+                    self.cond.wait(deadline - time.monotonic())
+
+    def start(self):
+        """Start the background poller (not needed when only webhooks feed the tracker)."""
+        if self.poller is None:
+            self.poller = threading.Thread(target=self._poll_loop, daemon=True)
+            self.poller.start()
+        return self
+
+    def wait(self, tx_id, timeout=None):
+        """Block until `tx_id` reaches a final status; returns it, or None on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.cond:
+            while tx_id not in self.final:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self.cond.wait(remaining)
+            return self.final[tx_id]
+
+    def wait_all(self, tx_ids, timeout=None):
+        """Wait for several transactions; returns `{tx_id: final status or None}`."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        return {
+            tx_id: self.wait(tx_id, None if deadline is None else max(0, deadline - time.monotonic()))
+            for tx_id in tx_ids
+        }
+
+    def open_count(self):
+        with self.cond:
+            return len(self.open)
+
+    def history(self, tx_id):
+        """Return `[(from_status, to_status, unix_time), ...]` for `tx_id`."""
+        with self.db_lock:
+            return self.db.execute(
+                "SELECT from_status, to_status, at FROM transitions WHERE tx_id = ? ORDER BY rowid",
+                (tx_id,)
+            ).fetchall()
+
+    def close(self):
+        with self.cond:
+            self.stopping = True
+            self.cond.notify_all()
+        if self.poller is not None:
+            self.poller.join()
+        with self.db_lock:
+            self.db.close()
+
+# === WEBHOOK RECEIVER ===
+def load_public_key(pem):
+    from cryptography.hazmat.primitives.serialization import load_pem_public_key
+    return load_pem_public_key(pem.encode() if isinstance(pem, str) else pem)
+
+def verify_signature(public_key, body, signature):
+    """Check the base64 `Fireblocks-Signature` header (RSA SHA-512) of a webhook body."""
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import padding
+    try:
+        public_key.verify(base64.b64decode(signature), body, padding.PKCS1v15(), hashes.SHA512())
+        return True
+    except (InvalidSignature, ValueError):
+        return False
+
+def start_webhook_receiver(tracker, host="127.0.0.1", port=8080, public_key_pem=None, allow_unsigned=False):
+    """
+    Serve Fireblocks webhooks on `host:port` and feed transaction events to `tracker`.
+
+    Every request must carry a valid Fireblocks-Signature header for
+    `public_key_pem` (Fireblocks' webhook public key), since anyone who can
+    reach the port could otherwise report sweeps as COMPLETED or FAILED.
+    Pass `allow_unsigned=True` to accept unsigned events, e.g. behind a
+    proxy that already verified them. Returns the server; call
+    `shutdown()` on it to stop.
+    """
+    if not public_key_pem and not allow_unsigned:
+        raise ValueError("start_webhook_receiver needs public_key_pem (or allow_unsigned=True)")
+    public_key = load_public_key(public_key_pem) if public_key_pem else None
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if public_key is not None and not verify_signature(
+                    public_key, body, self.headers.get("Fireblocks-Signature", "")):
+                self.send_response(401)
+                self.end_headers()
+                return
+            try:
+                event = json.loads(body)
+            except ValueError:
+                self.send_response(400)
+                self.end_headers()
+                return
+            if event.get("type") in ("TRANSACTION_CREATED", "TRANSACTION_STATUS_UPDATED"):
+                tracker.update(event.get("data") or {})
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
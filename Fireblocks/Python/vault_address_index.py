@@ -0,0 +1,198 @@
+"""
+----------------------------------------------------------------------------
+ Web3Firewall™ - Blockchain Risk & Compliance Intelligence Platform
+----------------------------------------------------------------------------
+
+ Title     : Fireblocks Vault Address Index
+ Version   : 1.0
+ Language  : Python 3.x
+ Author    : Web3Firewall Engineering Team
+ License   : Proprietary - Web3Firewall™ All Rights Reserved
+
+ Description:
+ Local vault/asset/tag -> address index used by the sweep scripts, so a
+ deposit -> quarantine move does not have to download the vault again to
+ find its addresses.
+ - filled by one paged pass over all vault accounts (or loaded from disk)
+ - refreshed one vault at a time when a lookup misses
+ - balances seen during a refresh are reused for BALANCE_MAX_AGE seconds
+ - reverse lookup: address -> [(vault, asset, tag), ...]; a miss re-indexes
+   all vaults (at most once per MISS_REFRESH_INTERVAL) to find new addresses
+ - thread safe, so concurrent sweeps can share one index
+
+----------------------------------------------------------------------------
+ (C) 2025 Web3Firewall™. All Rights Reserved.
+ https://web3firewall.ai
+----------------------------------------------------------------------------
+"""
+
+import json
+import os
+import threading
+import time
+
+from fireblocks_sdk import PagedVaultAccountsRequestFilters
+
+from fireblocks_throttle import call
+
+VAULT_PAGE_SIZE = 500       # vault accounts per page (Fireblocks allows up to 500)
+BALANCE_MAX_AGE = 30        # seconds a balance from a refresh is trusted
+MISS_REFRESH_INTERVAL = 60  # seconds before a vault (or, for an unknown address, every vault) is fetched again
+
+# The label given to generate_new_address is stored as the address
+# description; `tag` is the destination tag/memo of chains that use one.
+def address_label(address_info):
+    return address_info.get("description") or address_info.get("tag")
+
+class VaultAddressIndex:
+    def __init__(self, fireblocks, path=None, limiter=None, balance_max_age=BALANCE_MAX_AGE):
+        self.fireblocks = fireblocks
+        self.path = path
+        self.limiter = limiter
+        self.balance_max_age = balance_max_age
+        self.wallets = {}           # (vault_id, asset_id) -> {"tags": {tag: address}, "available", "total", "balance_at"}
+        self.by_address = {}        # lowercase address -> {(vault_id, asset_id, tag), ...}
+        self.vault_refreshed = {}   # vault_id -> monotonic time of the last fetch
+        self.refreshed_at = None    # monotonic time of the last full pass
+        self.lock = threading.RLock()
+        self.refresh_lock = threading.Lock()
+
+    def _call(self, fn, *args, **kwargs):
+        if self.limiter is None:
+            return fn(*args, **kwargs)
+        return call(self.limiter, fn, *args, **kwargs)
+
+    def _add_address(self, vault_id, asset_id, tag, address):
+        wallet = self.wallets.setdefault((vault_id, asset_id), {"tags": {}})
+        wallet["tags"].setdefault(tag, address)
+        # One address can hold several assets (e.g. ETH and its tokens).
+        self.by_address.setdefault(address.lower(), set()).add((vault_id, asset_id, tag))
+
+    def _index_vault(self, account, now):
+        vault_id = str(account["id"])
+        with self.lock:
+            for asset in account.get("assets", []):
+                wallet = self.wallets.setdefault((vault_id, asset["id"]), {"tags": {}})
+                for address_info in asset.get("addressInfos", []):
+                    label = address_label(address_info)
+                    if label and address_info.get("address"):
+                        self._add_address(vault_id, asset["id"], label, address_info["address"])
+                if "available" in asset:
+                    wallet.update(available=asset["available"], total=asset.get("total"), balance_at=now)
+            self.vault_refreshed[vault_id] = now
+
+    def refresh(self):
+        """Index every vault account in one paged pass."""
+        after = None
+        while True:
+            page = self._call(
+                self.fireblocks.get_vault_accounts_with_page_info,
+                PagedVaultAccountsRequestFilters(limit=VAULT_PAGE_SIZE, after=after)
+            )
+            now = time.monotonic()
+            for account in page.get("accounts", []):
+                self._index_vault(account, now)
+            after = (page.get("paging") or {}).get("after")
+            if not after:
+                break
+        self.refreshed_at = time.monotonic()
+        self.save()
+
+    def refresh_vault(self, vault_id):
+        """Fetch one vault account again, e.g. after new addresses were added to it."""
+        account = self._call(self.fireblocks.get_vault_account_by_id, vault_id)
+        self._index_vault(account, time.monotonic())
+        self.save()
+
+    def get_address(self, vault_id, asset_id, tag):
+        """Return the address tagged `tag`, fetching the vault once if it is not indexed yet."""
+        vault_id = str(vault_id)
+        with self.lock:
+            address = self.wallets.get((vault_id, asset_id), {}).get("tags", {}).get(tag)
+            refreshed = self.vault_refreshed.get(vault_id)
+        if address or (refreshed is not None and time.monotonic() - refreshed < MISS_REFRESH_INTERVAL):
+            return address
+        self.refresh_vault(vault_id)
+        with self.lock:
+            return self.wallets.get((vault_id, asset_id), {}).get("tags", {}).get(tag)
+
+    def get_available_balance(self, vault_id, asset_id):
+        """Return `(available, total)`, reusing the last refresh when it is recent enough."""
+        vault_id = str(vault_id)
+        with self.lock:
+            wallet = self.wallets.get((vault_id, asset_id), {})
+            if "balance_at" in wallet and time.monotonic() - wallet["balance_at"] <= self.balance_max_age:
+                return wallet["available"], wallet["total"]
+        balance = self._call(self.fireblocks.get_vault_account_asset, vault_id, asset_id)
+        with self.lock:
+            self.wallets.setdefault((vault_id, asset_id), {"tags": {}}).update(
+                available=balance.get("available"), total=balance.get("total"), balance_at=time.monotonic()
+            )
+        return balance.get("available"), balance.get("total")
+
+    def invalidate_balance(self, vault_id, asset_id):
+        """Forget the cached balance, e.g. because new funds are known to have arrived."""
+        with self.lock:
+            self.wallets.get((str(vault_id), asset_id), {}).pop("balance_at", None)
+
+    def record_transfer(self, vault_id, asset_id, amount):
+        """Take a submitted transfer off the cached balance so it is not moved twice."""
+        with self.lock:
+            wallet = self.wallets.get((str(vault_id), asset_id))
+            if wallet and "balance_at" in wallet:
+                wallet["available"] = str(max(0.0, float(wallet["available"]) - float(amount)))
+
+    def find_address(self, address):
+        """Return every `(vault_id, asset_id, tag)` the address is indexed under (sorted, may be empty)."""
+        with self.lock:
+            return sorted(self.by_address.get(address.lower(), ()))
+
+    def lookup_address(self, address):
+        """
+        Like find_address, but an address that is not indexed yet (e.g. one
+        created after the index was saved) triggers a full refresh, at most
+        once per MISS_REFRESH_INTERVAL, and is looked up again.
+        """
+        found = self.find_address(address)
+        if found:
+            return found
+        with self.refresh_lock:
+            # Another thread may have refreshed while this one waited.
+            found = self.find_address(address)
+            if found or (self.refreshed_at is not None
+                         and time.monotonic() - self.refreshed_at < MISS_REFRESH_INTERVAL):
+                return found
+            self.refresh()
+        return self.find_address(address)
+
+    def wallets_with_tag(self, tag):
+        """Return the `(vault_id, asset_id)` pairs that have an address tagged `tag`."""
+        with self.lock:
+            return [wallet for wallet, entry in self.wallets.items() if tag in entry["tags"]]
+
+    def load(self):
+        """Load the addresses saved by an earlier run; returns False if there is no file."""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        with open(self.path, "r") as f:
+            saved = json.load(f)
+        with self.lock:
+            for vault_id, assets in saved.get("vaults", {}).items():
+                for asset_id, tags in assets.items():
+                    for tag, address in tags.items():
+                        self._add_address(vault_id, asset_id, tag, address)
+        return True
+
+    def save(self):
+        # Only addresses are kept; balances are always fetched fresh in a new run.
+        if not self.path:
+            return
+        with self.lock:
+            vaults = {}
+            for (vault_id, asset_id), wallet in self.wallets.items():
+                if wallet["tags"]:
+                    vaults.setdefault(vault_id, {})[asset_id] = wallet["tags"]
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"vaults": vaults}, f)
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,435 @@
+"""
+------------------------------------------------------------
+ Web3Firewall — Local Stand-In Servers for Benchmarks
+------------------------------------------------------------
+
+Small HTTP servers that answer like the third-party services the
+scripts call, so whole flows can be driven locally:
+
+- EtherscanMock: `txlist` (startblock/endblock/page/offset/sort),
+  `getblocknobytime` and `eth_blockNumber`
+- JsonRpcMock: batched `eth_blockNumber` / `eth_getBlockByNumber`
+- Web3FirewallMock: POST /api/v1/policy/event and GET .../<eventId>
+- FireblocksMock: the vault, address and transaction endpoints used by
+  the Fireblocks scripts; transaction bodies with fields the SDK never
+  sends are rejected with HTTP 400, as Fireblocks does
+
+Etherscan and JSON-RPC serve the same SyntheticChain. Every server takes
+a Behavior: a fixed latency plus jitter, a share of requests failing with
+HTTP 500, and rate limiting, either at random (`throttle_rate`) or above
+`max_rps` requests per second. Rate-limited requests get the reply the
+real service sends: HTTP 200 with "Max rate limit reached" for
+Etherscan, HTTP 429 with Retry-After for the others.
+------------------------------------------------------------
+"""
+
+import itertools
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+BLOCK_TIME = 12     # seconds between synthetic blocks
+HEAD_BLOCK = 20000000
+FILLER_ADDRESS = "0x" + "9" * 40
+SENDER_ADDRESS = "0x" + "1" * 40
+
+
+class Behavior:
+    """Latency and failure settings shared by every request a server handles."""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, throttle_rate=0.0, max_rps=None,
+                 retry_after=1, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.max_rps = max_rps
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.tokens = float(max_rps or 0)
+        self.updated = time.monotonic()
+
+    def _over_limit(self):
+        if not self.max_rps:
+            return False
+        now = time.monotonic()
+        self.tokens = min(float(self.max_rps), self.tokens + (now - self.updated) * self.max_rps)
+        self.updated = now
+        if self.tokens < 1:
+            return True
+        self.tokens -= 1
+        return False
+
+    def decide(self):
+        """Sleep for the simulated latency and return "ok", "error" or "throttle"."""
+        with self.lock:
+            draw = self.random.random()
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            throttled = self._over_limit() or draw < self.throttle_rate
+        if delay:
+            time.sleep(delay)
+        if throttled:
+            return "throttle"
+        if draw < self.throttle_rate + self.error_rate:
+            return "error"
+        return "ok"
+
+
+class SyntheticChain:
+    """
+    Deterministic transactions to and from a set of watched addresses.
+
+    `txs_per_address` deposits per address are spread over the last `span`
+    blocks below HEAD_BLOCK; every block also carries `filler_per_block`
+    transactions between unwatched addresses, which only the JSON-RPC
+    mock exposes (Etherscan filters by address). `salt` makes hashes and
+    nonces unique between runs, so verdict caches never hide a request.
+    """
+
+    def __init__(self, addresses, txs_per_address, span=2000, filler_per_block=2, seed=1, salt=0):
+        self.head = HEAD_BLOCK
+        self.head_time = int(time.time())
+        self.filler_per_block = filler_per_block
+        self.by_address = {}
+        self.by_block = {}
+        rng = random.Random(seed)
+        nonce = itertools.count(salt * 10000000)
+        for address in addresses:
+            address = address.lower()
+            for _ in range(txs_per_address):
+                block = self.head - rng.randrange(span)
+                number = next(nonce)
+                tx = {
+                    "hash": f"0x{number:064x}",
+                    "from": SENDER_ADDRESS,
+                    "to": address,
+                    "nonce": number,
+                    "value": rng.choice((0, 10 ** 12, 10 ** 16, 10 ** 18, 5 * 10 ** 18)),
+                    "input": "0x",
+                    "gas": 21000,
+                    "gasPrice": 20 * 10 ** 9,
+                }
+                self.by_block.setdefault(block, []).append(tx)
+        for block, txs in self.by_block.items():
+            for index, tx in enumerate(txs):
+                tx["blockNumber"] = block
+                tx["transactionIndex"] = index
+                self.by_address.setdefault(tx["to"], []).append(tx)
+        for txs in self.by_address.values():
+            txs.sort(key=lambda tx: (tx["blockNumber"], tx["transactionIndex"]), reverse=True)
+
+    def timestamp(self, block):
+        return self.head_time - (self.head - block) * BLOCK_TIME
+
+    def block_at(self, timestamp):
+        return max(0, min(self.head, self.head - (self.head_time - int(timestamp)) // BLOCK_TIME))
+
+    def txlist_row(self, tx):
+        return {
+            "blockNumber": str(tx["blockNumber"]),
+            "timeStamp": str(self.timestamp(tx["blockNumber"])),
+            "hash": tx["hash"],
+            "nonce": str(tx["nonce"]),
+            "transactionIndex": str(tx["transactionIndex"]),
+            "from": tx["from"],
+            "to": tx["to"],
+            "value": str(tx["value"]),
+            "gas": str(tx["gas"]),
+            "gasPrice": str(tx["gasPrice"]),
+            "input": tx["input"],
+            "isError": "0",
+        }
+
+    def rpc_block(self, number, full):
+        txs = list(self.by_block.get(number, ()))
+        for index in range(self.filler_per_block):
+            txs.append({
+                "hash": f"0xf{number:031x}{index:032x}", "from": SENDER_ADDRESS, "to": FILLER_ADDRESS,
+                "nonce": index, "value": 1, "input": "0x", "gas": 21000, "gasPrice": 10 ** 9,
+                "transactionIndex": len(txs),
+            })
+        if full:
+            txs = [{
+                "hash": tx["hash"], "from": tx["from"], "to": tx["to"], "nonce": hex(tx["nonce"]),
+                "value": hex(tx["value"]), "input": tx["input"], "gas": hex(tx["gas"]),
+                "gasPrice": hex(tx["gasPrice"]), "transactionIndex": hex(tx["transactionIndex"]),
+                "r": "0x1", "s": "0x2", "v": "0x1b",
+            } for tx in txs]
+        else:
+            txs = [tx["hash"] for tx in txs]
+        return {"number": hex(number), "timestamp": hex(self.timestamp(number)), "transactions": txs}
+
+
+class MockServer:
+    """Threaded HTTP server; subclasses implement `handle()` and the throttled reply."""
+
+    def __init__(self, behavior=None):
+        self.behavior = behavior or Behavior()
+        self.counts = {"requests": 0, "ok": 0, "error": 0, "throttle": 0}
+        self.counts_lock = threading.Lock()
+        self.server = None
+
+    def handle(self, method, path, query, body):
+        """Return `(status, json_body)` for a request that is neither failed nor throttled."""
+        raise NotImplementedError
+
+    def throttled(self):
+        return 429, {"message": "Too many requests"}, {"Retry-After": str(self.behavior.retry_after)}
+
+    def snapshot(self):
+        with self.counts_lock:
+            return dict(self.counts)
+
+    def _respond(self, method, handler):
+        url = urlparse(handler.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = json.loads(handler.rfile.read(length)) if length else None
+        outcome = self.behavior.decide()
+        with self.counts_lock:
+            self.counts["requests"] += 1
+            self.counts[outcome] += 1
+        headers = {}
+        if outcome == "throttle":
+            status, payload, headers = self.throttled()
+        elif outcome == "error":
+            status, payload = 500, {"message": "simulated server error"}
+        else:
+            status, payload = self.handle(method, url.path, query, body)
+        data = json.dumps(payload).encode()
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def start(self, host="127.0.0.1", port=0):
+        """Serve in a daemon thread; returns the base URL."""
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Send headers and body in one segment; split writes stall on delayed ACKs.
+            wbufsize = -1
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                mock._respond("GET", self)
+
+            def do_POST(self):
+                mock._respond("POST", self)
+
+            def log_message(self, format, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+            request_queue_size = 256
+
+        self.server = Server((host, port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://{host}:{self.server.server_port}"
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+class EtherscanMock(MockServer):
+    def __init__(self, chain=None, behavior=None):
+        super().__init__(behavior)
+        self.chain = chain
+
+    def throttled(self):
+        # Etherscan answers HTTP 200 and puts the rate limit into the body.
+        return 200, {"status": "0", "message": "NOTOK", "result": "Max rate limit reached"}, {}
+
+    def handle(self, method, path, query, body):
+        module, action = query.get("module"), query.get("action")
+        if module == "proxy" and action == "eth_blockNumber":
+            return 200, {"jsonrpc": "2.0", "id": 83, "result": hex(self.chain.head)}
+        if module == "block" and action == "getblocknobytime":
+            return 200, {"status": "1", "message": "OK", "result": str(self.chain.block_at(query["timestamp"]))}
+        if module == "account" and action == "txlist":
+            start, end = int(query.get("startblock", 0)), int(query.get("endblock", 99999999))
+            rows = [tx for tx in self.chain.by_address.get(query["address"].lower(), ())
+                    if start <= tx["blockNumber"] <= end]
+            if query.get("sort") != "desc":
+                rows.reverse()
+            offset, page = int(query.get("offset", 10000)), int(query.get("page", 1))
+            rows = rows[(page - 1) * offset:page * offset]
+            if not rows:
+                return 200, {"status": "0", "message": "No transactions found", "result": []}
+            return 200, {"status": "1", "message": "OK", "result": [self.chain.txlist_row(tx) for tx in rows]}
+        return 200, {"status": "0", "message": "NOTOK", "result": f"unsupported {module}/{action}"}
+
+
+class JsonRpcMock(MockServer):
+    def __init__(self, chain=None, behavior=None):
+        super().__init__(behavior)
+        self.chain = chain
+
+    def _call(self, request):
+        method, params = request.get("method"), request.get("params") or []
+        if method == "eth_blockNumber":
+            result = hex(self.chain.head)
+        elif method == "eth_getBlockByNumber":
+            number = int(params[0], 16)
+            result = self.chain.rpc_block(number, params[1]) if number <= self.chain.head else None
+        else:
+            return {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": -32601, "message": "not found"}}
+        return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+
+    def handle(self, method, path, query, body):
+        if isinstance(body, list):
+            return 200, [self._call(request) for request in body]
+        return 200, self._call(body or {})
+
+
+class Web3FirewallMock(MockServer):
+    """Returns allow / deny / needsapproval in the given proportions."""
+
+    def __init__(self, behavior=None, verdicts=(("allow", 0.9), ("deny", 0.05), ("needsapproval", 0.05))):
+        super().__init__(behavior)
+        self.actions = [action for action, _ in verdicts]
+        self.weights = [weight for _, weight in verdicts]
+        self.random = random.Random(7)
+        self.lock = threading.Lock()
+
+    def handle(self, method, path, query, body):
+        if method == "GET":
+            return 200, {"actionToTake": "allow", "eventId": path.rstrip("/").rsplit("/", 1)[-1]}
+        with self.lock:
+            action = self.random.choices(self.actions, self.weights)[0]
+        return 200, {"actionToTake": action, "eventId": uuid.uuid4().hex}
+
+
+# The body fields, operations and peer types fireblocks_sdk's create_transaction can send.
+TRANSACTION_FIELDS = frozenset({
+    "waitForStatus", "operation", "assetId", "source", "amount", "fee", "feeLevel", "maxFee", "maxTotalFee",
+    "failOnLowFee", "gasPrice", "gasLimit", "note", "destination", "networkFee", "customerRefId",
+    "replaceTxByHash", "treatAsGrossAmount", "destinations", "extraParameters", "externalTxId", "forceSweep",
+    "priorityFee",
+})
+TRANSACTION_OPERATIONS = frozenset({"TRANSFER", "MINT", "BURN", "SUPPLY_TO_COMPOUND", "REDEEM_FROM_COMPOUND",
+                                    "RAW", "CONTRACT_CALL", "ONE_TIME_ADDRESS", "TYPED_MESSAGE"})
+PEER_TYPES = frozenset({"VAULT_ACCOUNT", "EXCHANGE_ACCOUNT", "INTERNAL_WALLET", "EXTERNAL_WALLET", "UNKNOWN",
+                        "FIAT_ACCOUNT", "NETWORK_CONNECTION", "COMPOUND", "ONE_TIME_ADDRESS"})
+
+
+def transaction_error(body):
+    """Return why Fireblocks would reject a create-transaction `body`, or None."""
+    if not isinstance(body, dict):
+        return "body must be a JSON object"
+    unknown = sorted(set(body) - TRANSACTION_FIELDS)
+    if unknown:
+        return f"unknown fields: {', '.join(unknown)}"
+    if body.get("operation", "TRANSFER") not in TRANSACTION_OPERATIONS:
+        return f"invalid operation {body['operation']}"
+    for side in ("source", "destination"):
+        peer = body.get(side)
+        if peer is not None and (not isinstance(peer, dict) or peer.get("type") not in PEER_TYPES):
+            return f"invalid {side} {peer}"
+    return None
+
+
+class FireblocksMock(MockServer):
+    """
+    Vault accounts with one or more assets, each holding tagged addresses.
+
+    Accounts are listed with both `addresses` (with createdAt) and
+    `addressInfos`, the two shapes the scripts read. As in Fireblocks, an
+    address's label is its `description`; `tag` (the destination tag or
+    memo) stays empty.
+    """
+
+    def __init__(self, behavior=None):
+        super().__init__(behavior)
+        self.accounts = {}      # vault id -> {"id", "name", "assets": {asset id: asset}}
+        self.transactions = {}
+        self.lock = threading.Lock()
+        self.address_ids = itertools.count(1)
+
+    def reset(self):
+        with self.lock:
+            self.accounts.clear()
+            self.transactions.clear()
+
+    def _new_address(self, description):
+        return {"address": f"0x{next(self.address_ids):040x}", "tag": "", "description": description,
+                "createdAt": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime())}
+
+    def add_wallet(self, vault_id, asset_id, tags=("deposit",), available="1.0"):
+        with self.lock:
+            account = self.accounts.setdefault(str(vault_id), {"id": str(vault_id), "name": f"vault {vault_id}",
+                                                               "assets": {}})
+            asset = account["assets"].setdefault(asset_id, {"id": asset_id, "available": available,
+                                                            "total": available, "addresses": []})
+            for tag in tags:
+                asset["addresses"].append(self._new_address(tag))
+
+    def _account_json(self, account):
+        return {
+            "id": account["id"],
+            "name": account["name"],
+            "assets": [
+                dict(asset, addressInfos=[
+                    {"address": a["address"], "description": a["description"], "tag": a["tag"]}
+                    for a in asset["addresses"]
+                ])
+                for asset in account["assets"].values()
+            ],
+        }
+
+    def handle(self, method, path, query, body):
+        parts = path.strip("/").split("/")[1:]   # drop the "v1" prefix
+        with self.lock:
+            if parts == ["vault", "accounts_paged"]:
+                ids = sorted(self.accounts, key=int)
+                start = int(query.get("after") or 0)
+                limit = int(query.get("limit") or 200)
+                page = ids[start:start + limit]
+                paging = {"after": str(start + limit)} if start + limit < len(ids) else {}
+                return 200, {"accounts": [self._account_json(self.accounts[i]) for i in page], "paging": paging}
+            if parts[:2] == ["vault", "accounts"] and len(parts) >= 3:
+                account = self.accounts.get(parts[2])
+                if account is None:
+                    return 404, {"message": "vault account not found", "code": 1004}
+                if len(parts) == 3:
+                    return 200, self._account_json(account)
+                asset = account["assets"].get(parts[3])
+                if asset is None:
+                    return 404, {"message": "asset not found", "code": 1006}
+                if len(parts) == 4:
+                    return 200, {"id": asset["id"], "available": asset["available"], "total": asset["total"]}
+                if parts[4] == "addresses" and method == "GET":
+                    return 200, asset["addresses"]
+                if parts[4] == "addresses" and method == "POST":
+                    address = self._new_address((body or {}).get("description"))
+                    asset["addresses"].append(address)
+                    return 200, {"address": address["address"], "tag": address["tag"]}
+            if parts == ["transactions"] and method == "POST":
+                error = transaction_error(body)
+                if error:
+                    return 400, {"message": error, "code": 1401}
+                tx = {"id": uuid.uuid4().hex, "status": "SUBMITTED", "createdAt": int(time.time() * 1000)}
+                source = ((body or {}).get("source") or {}).get("id")
+                asset = self.accounts.get(str(source), {}).get("assets", {}).get((body or {}).get("assetId"))
+                if asset is not None:
+                    asset["available"] = "0"
+                self.transactions[tx["id"]] = dict(tx, status="COMPLETED")
+                return 200, tx
+            if parts == ["transactions"]:
+                return 200, list(self.transactions.values())[-int(query.get("limit") or 200):]
+            if parts[0] == "transactions" and len(parts) == 2:
+                tx = self.transactions.get(parts[1])
+                return (200, tx) if tx else (404, {"message": "transaction not found"})
+        return 404, {"message": f"unsupported {method} {path}"}
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+------------------------------------------------------------
+ Web3Firewall — Benchmark Harness
+------------------------------------------------------------
+
+Drives the real scripts against local stand-in servers (mock_servers.py)
+with synthetic workloads of several sizes, and reports throughput and
+p50/p95/p99 latency per scenario. Nothing leaves the machine.
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py monitor-etherscan simulate-bulk --sizes 100,1000,10000
+    python benchmarks/run_benchmarks.py --latency 0.05 --jitter 0.05 --error-rate 0.01 --throttle-rate 0.05
+    python benchmarks/run_benchmarks.py --json before.json
+    python benchmarks/run_benchmarks.py --baseline before.json --max-regression 0.2
+
+Scenarios (size = transactions, or vault wallets for Fireblocks):
+
+    monitor-etherscan     monitor.py watchlist run, Etherscan txlist + Web3Firewall
+    monitor-rpc           the same, scanning blocks from the JSON-RPC stand-in
+    evaluate              check_broadcasted_evm_txn.evaluate_transaction, --concurrency callers
+    simulate-bulk         simulate_evm_txn.simulate_bulk over a JSON Lines batch
+    fireblocks-sweep      mv_funds_deposit_quarantine.sweep_wallets (bulk sweep)
+    fireblocks-provision  auto_create_FB_deposit_wallet address provisioning
+
+Latency percentiles are per item: per submitted transaction for the
+monitor (from its stage metrics), per call or row for evaluate and
+simulate, per wallet for the Fireblocks flows. The Fireblocks scenarios
+need fireblocks_sdk (and its cryptography dependency) installed and are
+skipped otherwise.
+
+Errors are items that did not make it through: for the monitor, every
+synthetic transaction that did not get a verdict (dropped by a failed
+fetch or submission), otherwise failed calls, rows or wallets.
+
+With --baseline, a scenario whose throughput fell by more than
+--max-regression, or that lost more items than in the saved --json
+results, fails the run (exit status 1), so the harness can gate a
+release.
+------------------------------------------------------------
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "web3firewall", "python"), os.path.join(ROOT, "Fireblocks", "Python")]
+
+import check_broadcasted_evm_txn
+import monitor
+import simulate_evm_txn
+from mock_servers import (Behavior, EtherscanMock, FireblocksMock, JsonRpcMock, SyntheticChain,
+                          Web3FirewallMock)
+from web3firewall_client import Web3FirewallClient
+
+DEFAULT_SIZES = "100,1000"
+TXS_PER_ADDRESS = 50      # synthetic deposits per watched address in the monitor scenarios
+CONCURRENCY = 8           # requests in flight, as the scripts' own defaults
+CHAIN_SPAN = 2000         # blocks the synthetic transactions are spread over
+
+
+class Skipped(Exception):
+    """Raised by a scenario that cannot run in this environment."""
+
+
+def import_script(name):
+    """Import one of the scripts under test, skipping the scenario if it (or its SDK) cannot be imported."""
+    try:
+        return importlib.import_module(name)
+    except ImportError as e:
+        raise Skipped(f"cannot import {name} ({e})")
+
+
+def percentiles(samples, points=(50, 95, 99)):
+    values = sorted(samples)
+    if not values:
+        return {f"p{point}": None for point in points}
+    return {f"p{point}": values[min(len(values) - 1, int(len(values) * point / 100))] for point in points}
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the scripts' per-transaction output while a scenario runs."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+@contextlib.contextmanager
+def timed(module, name, samples):
+    """Replace `module.name` with a wrapper appending each call's duration to `samples`."""
+    original = getattr(module, name)
+
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            samples.append(time.perf_counter() - started)
+
+    setattr(module, name, wrapper)
+    try:
+        yield
+    finally:
+        setattr(module, name, original)
+
+
+class Bench:
+    """The stand-in servers and settings shared by every scenario."""
+
+    def __init__(self, args):
+        self.args = args
+        self.salt = 0
+
+        def behavior(seed):
+            return Behavior(args.latency, args.jitter, args.error_rate, args.throttle_rate, args.max_rps,
+                            seed=seed)
+
+        self.etherscan = EtherscanMock(behavior=behavior(1))
+        self.rpc = JsonRpcMock(behavior=behavior(2))
+        self.web3firewall = Web3FirewallMock(behavior=behavior(3))
+        self.fireblocks = FireblocksMock(behavior=behavior(4))
+        self.mocks = (self.etherscan, self.rpc, self.web3firewall, self.fireblocks)
+        self.etherscan_url = self.etherscan.start()
+        self.rpc_url = self.rpc.start()
+        self.web3firewall_url = self.web3firewall.start() + "/api/v1/policy/event"
+        self.fireblocks_url = self.fireblocks.start()
+        self.fireblocks_sdk = None
+
+        monitor.ETHERSCAN_API_URL = self.etherscan_url
+        monitor.WEB3FIREWALL_API_URL = self.web3firewall_url
+        check_broadcasted_evm_txn.client = self.client()
+        simulate_evm_txn.WEB3FIREWALL_API_URL = self.web3firewall_url
+        simulate_evm_txn.client = self.client()
+
+    def client(self):
+        return Web3FirewallClient("benchmark", api_url=self.web3firewall_url, pool_size=self.args.concurrency)
+
+    def next_salt(self):
+        self.salt += 1
+        return self.salt
+
+    def chain(self, addresses, txs_per_address):
+        chain = SyntheticChain(addresses, txs_per_address, span=CHAIN_SPAN, salt=self.next_salt())
+        self.etherscan.chain = chain
+        self.rpc.chain = chain
+        return chain
+
+    def get_fireblocks(self):
+        if self.fireblocks_sdk is None:
+            try:
+                from cryptography.hazmat.primitives import serialization
+                from cryptography.hazmat.primitives.asymmetric import rsa
+                from fireblocks_sdk import FireblocksSDK
+            except ImportError as e:
+                raise Skipped(f"needs fireblocks_sdk ({e})")
+            key = rsa.generate_private_key(public_exponent=65537, key_size=2048).private_bytes(
+                serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+            ).decode()
+            self.fireblocks_sdk = FireblocksSDK(key, "benchmark", api_base_url=self.fireblocks_url)
+        return self.fireblocks_sdk
+
+    def counts(self):
+        totals = {}
+        for mock in self.mocks:
+            for key, value in mock.snapshot().items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def stop(self):
+        for mock in self.mocks:
+            mock.stop()
+
+
+# === SCENARIOS ===
+# Each returns (items, errors, latency percentiles in seconds).
+
+def run_monitor(bench, size, rpc):
+    address_count = max(1, size // TXS_PER_ADDRESS)
+    addresses = [f"0x{index:040x}" for index in range(1, address_count + 1)]
+    chain = bench.chain(addresses, max(1, size // address_count))
+    argv = ["--watchlist", "benchmark", "1", "--etherscan-rps", "0", "--web3firewall-rps", "0",
+            "--concurrency", str(bench.args.concurrency)]
+    if rpc:
+        argv += ["--rpc-url", bench.rpc_url]
+    options = monitor.parse_args(argv)
+    cutoff = chain.timestamp(chain.head - CHAIN_SPAN)
+    metrics = monitor.get_metrics()
+    metrics.reset()
+    with quiet():
+        monitor.run_watchlist(addresses, cutoff, options)
+    summary = metrics.summary()
+    submit = summary["stages"].get("submit", {})
+    # Items are transactions that got a verdict; everything else the chain
+    # holds was dropped on the way (failed fetch or submission).
+    screened = sum(value for name, value in summary["counters"].items() if name.startswith("verdicts"))
+    expected = sum(len(txs) for txs in chain.by_address.values())
+    return screened, expected - screened, {point: submit.get(point) for point in ("p50", "p95", "p99")}
+
+
+def bench_monitor_etherscan(bench, size):
+    return run_monitor(bench, size, rpc=False)
+
+
+def bench_monitor_rpc(bench, size):
+    return run_monitor(bench, size, rpc=True)
+
+
+def bench_evaluate(bench, size):
+    payload = check_broadcasted_evm_txn.transaction_payload
+    salt = bench.next_salt() * 10000000
+    events = [dict(payload, data=dict(payload["data"], nonce=salt + index)) for index in range(size)]
+
+    def evaluate(event):
+        started = time.perf_counter()
+        result = check_broadcasted_evm_txn.evaluate_transaction(event)
+        return time.perf_counter() - started, result is None
+
+    with quiet(), ThreadPoolExecutor(max_workers=bench.args.concurrency) as pool:
+        outcomes = list(pool.map(evaluate, events))
+    return len(outcomes), sum(failed for _, failed in outcomes), percentiles(seconds for seconds, _ in outcomes)
+
+
+def bench_simulate_bulk(bench, size):
+    salt = bench.next_salt() * 10000000
+    rows = io.StringIO("".join(
+        json.dumps({"id": index, "from": "0x72a5843cc08275C8171E582972Aa42Da8C397B2A",
+                    "to": "0xA160cdAB225685dA1d56aa342Ad8841c3b53f291", "value": str(index + 1),
+                    "gasLimit": "21000", "maxFeePerGas": "30000000000", "maxPriorityFeePerGas": "1000000000",
+                    "nonce": salt + index, "input": "0x"}) + "\n"
+        for index in range(size)
+    ))
+    samples = []
+    with open(os.devnull, "w") as output, timed(simulate_evm_txn, "simulate_row", samples):
+        counts = simulate_evm_txn.simulate_bulk(rows, output, "jsonl", bench.args.concurrency)
+    return sum(counts.values()), counts.get("error", 0) + counts.get("invalid", 0), percentiles(samples)
+
+
+def bench_fireblocks_sweep(bench, size):
+    fireblocks = bench.get_fireblocks()
+    sweeper = import_script("mv_funds_deposit_quarantine")
+
+    bench.fireblocks.reset()
+    for vault_id in range(size):
+        bench.fireblocks.add_wallet(vault_id, "ETH", tags=("deposit", "quarantine"), available="1.5")
+    sweeper.VAULT_INDEX_PATH = None
+    sweeper.FIREBLOCKS_RATE_LIMIT = bench.args.fireblocks_rps
+    sweeper._vault_index = None   # index the fresh vaults, not the previous run's
+    wallets = [(str(vault_id), "ETH") for vault_id in range(size)]
+    samples = []
+    with timed(sweeper, "sweep_wallet", samples):
+        results = list(sweeper.sweep_wallets(fireblocks, wallets, concurrency=bench.args.concurrency))
+    return len(results), sum(result["status"] != "moved" for result in results), percentiles(samples)
+
+
+def bench_fireblocks_provision(bench, size):
+    fireblocks = bench.get_fireblocks()
+    provisioner = import_script("auto_create_FB_deposit_wallet")
+
+    bench.fireblocks.reset()
+    for vault_id in range(size):
+        bench.fireblocks.add_wallet(vault_id, "ETH", tags=("deposit",))
+    provisioner.FIREBLOCKS_RATE_LIMIT = bench.args.fireblocks_rps
+    samples = []
+    with tempfile.TemporaryDirectory() as tmp, quiet(), timed(provisioner, "provision_wallet", samples):
+        deposits = provisioner.get_recent_deposit_addresses(fireblocks, since="2000-01-01T00:00:00.000Z")
+        counts = provisioner.create_new_addresses(fireblocks, deposits, bench.args.concurrency,
+                                                  journal_path=os.path.join(tmp, "journal.jsonl"))
+    return len(samples), counts["failed"], percentiles(samples)
+
+
+SCENARIOS = {
+    "monitor-etherscan": bench_monitor_etherscan,
+    "monitor-rpc": bench_monitor_rpc,
+    "evaluate": bench_evaluate,
+    "simulate-bulk": bench_simulate_bulk,
+    "fireblocks-sweep": bench_fireblocks_sweep,
+    "fireblocks-provision": bench_fireblocks_provision,
+}
+
+
+def run_scenario(bench, name, size):
+    before = bench.counts()
+    started = time.perf_counter()
+    items, errors, latency = SCENARIOS[name](bench, size)
+    seconds = time.perf_counter() - started
+    after = bench.counts()
+    return {
+        "scenario": name,
+        "size": size,
+        "items": items,
+        "seconds": seconds,
+        "throughput": items / seconds if seconds else 0.0,
+        **latency,
+        "errors": errors,
+        "requests": after["requests"] - before["requests"],
+        "throttled": after["throttle"] - before["throttle"],
+    }
+
+
+def format_ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.1f}"
+
+
+def print_result(result):
+    print(f"{result['scenario']:<22}{result['size']:>7}{result['items']:>7}{result['seconds']:>9.2f}"
+          f"{result['throughput']:>10.1f}{format_ms(result['p50']):>9}{format_ms(result['p95']):>9}"
+          f"{format_ms(result['p99']):>9}{result['errors']:>7}{result['requests']:>9}{result['throttled']:>6}",
+          flush=True)
+
+
+def compare(results, baseline_path, max_regression):
+    """
+    Return `(result, reason)` for every result that regressed against the baseline:
+    throughput fell by more than `max_regression`, or items failed that did not before.
+    """
+    with open(baseline_path, "r") as f:
+        baseline = {(entry["scenario"], entry["size"]): entry for entry in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        previous = baseline.get((result["scenario"], result["size"]))
+        if not previous:
+            continue
+        if result["throughput"] < previous["throughput"] * (1 - max_regression):
+            regressions.append((result, f"{result['throughput']:.1f} items/s vs {previous['throughput']:.1f}"))
+        if result["errors"] > previous["errors"]:
+            regressions.append((result, f"{result['errors']} errors vs {previous['errors']}"))
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Web3Firewall and Fireblocks scripts against "
+                                                 "local stand-in servers.")
+    parser.add_argument("scenarios", nargs="*", metavar="scenario",
+                        help=f"scenarios to run (default: all): {', '.join(SCENARIOS)}")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"comma-separated workload sizes (default: {DEFAULT_SIZES})")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every mock reply")
+    parser.add_argument("--jitter", type=float, default=0.01, help="extra random latency, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests failing with HTTP 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of requests rate-limited at random")
+    parser.add_argument("--max-rps", type=float, help="rate-limit each mock above this many requests/second")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY,
+                        help=f"requests in flight per scenario (default: {CONCURRENCY})")
+    parser.add_argument("--fireblocks-rps", type=float, default=0,
+                        help="client-side Fireblocks pacing; 0 = unpaced (default)")
+    parser.add_argument("--json", metavar="FILE", help="also write the results to FILE")
+    parser.add_argument("--baseline", metavar="FILE", help="compare throughput with an earlier --json FILE")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="allowed throughput drop against --baseline (default: 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = args.scenarios or list(SCENARIOS)
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    bench = Bench(args)
+
+    print(f"{'scenario':<22}{'size':>7}{'items':>7}{'seconds':>9}{'items/s':>10}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'p99 ms':>9}{'errors':>7}{'requests':>9}{'429s':>6}")
+    results = []
+    try:
+        for name in names:
+            for size in sizes:
+                try:
+                    result = run_scenario(bench, name, size)
+                except Skipped as e:
+                    print(f"{name:<22}{size:>7}  skipped: {e}")
+                    break
+                results.append(result)
+                print_result(result)
+    finally:
+        bench.stop()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"settings": {key: value for key, value in vars(args).items()
+                                    if key not in ("json", "baseline")}, "results": results}, f, indent=2)
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.max_regression)
+        for result, reason in regressions:
+            print(f"REGRESSION {result['scenario']} size {result['size']}: {reason} in {args.baseline}")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
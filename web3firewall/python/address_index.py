@@ -0,0 +1,203 @@
+"""
+------------------------------------------------------------
+ Web3Firewall — Compact Address Index
+------------------------------------------------------------
+
+Membership index for very large watchlists (millions of custody
+addresses), used by monitor.py to match block transactions.
+
+Addresses are stored as sorted fixed 20-byte keys in one contiguous
+buffer (~20 bytes per address, against well over 100 for a Python set of
+hex strings). A directory of 65,536 offsets keyed by the first two bytes
+narrows every lookup to a handful of keys, which are then searched with
+one C-level `find`, so a match costs O(1) on average. An optional Bloom
+pre-filter rejects most non-members without touching the key pages of a
+memory-mapped index at all.
+
+Indexes can be saved to a file and are memory-mapped on load, so even
+huge watchlists are ready at startup without being parsed again:
+
+    python address_index.py build addresses.txt addresses.idx [bloom_bits_per_key]
+    python monitor.py --watchlist addresses.idx <lookback_hours> --rpc-url ...
+------------------------------------------------------------
+"""
+
+import hashlib
+import mmap
+import struct
+import sys
+from array import array
+
+MAGIC = b"W3FAIDX1"
+HEADER = struct.Struct("<8sQQ")     # magic, address count, bloom size in bytes
+KEY_SIZE = 20
+BUCKETS = 1 << 16                   # directory keyed by the first two bytes
+BLOOM_HASHES = 4                    # independent 32-bit slices of the address
+
+
+def to_key(address):
+    """Return the 20-byte key for a hex string (with or without 0x) or raw bytes."""
+    if isinstance(address, (bytes, bytearray, memoryview)):
+        key = bytes(address)
+    else:
+        key = bytes.fromhex(address[2:] if address[:2] in ("0x", "0X") else address)
+    if len(key) != KEY_SIZE:
+        raise ValueError(f"not a 20-byte address: {address!r}")
+    return key
+
+
+def _bloom_positions(key, bits):
+    # Addresses are already uniformly distributed, so slices of the key
+    # serve as independent hash values.
+    for i in range(1, BLOOM_HASHES + 1):
+        yield int.from_bytes(key[4 * i:4 * i + 4], "little") % bits
+
+
+class AddressIndex:
+    def __init__(self, keys, count, directory, bloom=b"", key_offset=0, backing=None):
+        self.keys = keys              # bytes or mmap holding the sorted 20-byte keys
+        self.key_offset = key_offset  # where the keys start inside `keys`
+        self.count = count
+        self.directory = directory    # BUCKETS + 1 key offsets, one per two-byte prefix
+        self.bloom = bloom            # bit array, empty when disabled
+        self.bloom_bits = len(bloom) * 8
+        self.backing = backing        # open file kept alive while the mmap is in use
+
+    @classmethod
+    def from_addresses(cls, addresses, bloom_bits_per_key=0):
+        """Build an in-memory index; `bloom_bits_per_key` of ~10 gives ~1% false positives."""
+        unique = sorted({to_key(address) for address in addresses})
+        keys = b"".join(unique)
+        directory = array("I", [0]) * (BUCKETS + 1)
+        for key in unique:
+            directory[((key[0] << 8) | key[1]) + 1] += 1
+        for bucket in range(1, BUCKETS + 1):
+            directory[bucket] += directory[bucket - 1]
+
+        bloom = bytearray()
+        if bloom_bits_per_key and unique:
+            bloom = bytearray((len(unique) * bloom_bits_per_key + 7) // 8)
+            bits = len(bloom) * 8
+            for key in unique:
+                for position in _bloom_positions(key, bits):
+                    bloom[position >> 3] |= 1 << (position & 7)
+        return cls(keys, len(unique), directory, bytes(bloom))
+
+    @classmethod
+    def load(cls, path):
+        """Memory-map an index written by `save()`."""
+        f = open(path, "rb")
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, bloom_size = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            data.close()
+            f.close()
+            raise ValueError(f"{path} is not an address index")
+        offset = HEADER.size
+        directory = array("I")
+        directory.frombytes(data[offset:offset + (BUCKETS + 1) * directory.itemsize])
+        offset += (BUCKETS + 1) * directory.itemsize
+        bloom = data[offset:offset + bloom_size]
+        offset += bloom_size
+        # The keys stay in the mapping and are paged in on demand.
+        return cls(data, count, directory, bloom, key_offset=offset, backing=f)
+
+    def __reduce_ex__(self, protocol):
+        # A memory-mapped index is sent to worker processes as its file name
+        # and mapped again there instead of being copied.
+        if self.backing is not None:
+            return type(self).load, (self.backing.name,)
+        return super().__reduce_ex__(protocol)
+
+    def shard(self, index, count):
+        """Return an in-memory index of every `count`-th address, starting at the `index`-th."""
+        start = self.key_offset + index * KEY_SIZE
+        end = self.key_offset + self.count * KEY_SIZE
+        keys = (self.keys[position:position + KEY_SIZE] for position in range(start, end, count * KEY_SIZE))
+        return type(self).from_addresses(keys, bloom_bits_per_key=self.bloom_bits // max(self.count, 1))
+
+    def digest(self):
+        """Return a hex digest of the indexed addresses, identifying this watch set."""
+        start = self.key_offset
+        return hashlib.blake2b(memoryview(self.keys)[start:start + self.count * KEY_SIZE], digest_size=16).hexdigest()
+
+    @staticmethod
+    def is_index_file(path):
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.count, len(self.bloom)))
+            f.write(array("I", self.directory).tobytes())
+            f.write(bytes(self.bloom))
+            f.write(self.keys[self.key_offset:self.key_offset + self.count * KEY_SIZE])
+
+    def contains_key(self, key):
+        """Membership test for a 20-byte key."""
+        if self.bloom_bits:
+            bloom = self.bloom
+            for position in _bloom_positions(key, self.bloom_bits):
+                if not bloom[position >> 3] & (1 << (position & 7)):
+                    return False
+        bucket = (key[0] << 8) | key[1]
+        start = self.key_offset + self.directory[bucket] * KEY_SIZE
+        end = self.key_offset + self.directory[bucket + 1] * KEY_SIZE
+        while start < end:
+            found = self.keys.find(key, start, end)
+            if found < 0:
+                return False
+            if (found - self.key_offset) % KEY_SIZE == 0:
+                return True
+            # Matched across two neighbouring keys; keep looking.
+            start = found + 1
+        return False
+
+    def __contains__(self, address):
+        if not address:
+            return False
+        try:
+            return self.contains_key(to_key(address))
+        except ValueError:
+            return False
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        """Yield the indexed addresses as lowercase 0x-prefixed hex strings."""
+        end = self.key_offset + self.count * KEY_SIZE
+        for position in range(self.key_offset, end, KEY_SIZE):
+            yield "0x" + self.keys[position:position + KEY_SIZE].hex()
+
+    def close(self):
+        if self.backing is not None:
+            self.keys.close()
+            self.backing.close()
+            self.backing = None
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) not in (3, 4) or argv[0] != "build":
+        print("Usage: python address_index.py build <watchlist.txt> <index_file> [bloom_bits_per_key]")
+        sys.exit(1)
+    source, target = argv[1], argv[2]
+    bloom_bits_per_key = int(argv[3]) if len(argv) == 4 else 0
+    addresses = []
+    with open(source, "r") as f:
+        for line_no, line in enumerate(f, 1):
+            address = line.split("#", 1)[0].strip()
+            if not address:
+                continue
+            try:
+                addresses.append(to_key(address))
+            except ValueError:
+                print(f"Skipping invalid address on line {line_no} of {source}: {address}")
+    index = AddressIndex.from_addresses(addresses, bloom_bits_per_key=bloom_bits_per_key)
+    index.save(target)
+    print(f"Indexed {len(index)} addresses into {target}.")
+
+
+if __name__ == "__main__":
+    main()
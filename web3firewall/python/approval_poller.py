@@ -0,0 +1,214 @@
+"""
+------------------------------------------------------------
+ Web3Firewall — Pending-Approval Poller
+------------------------------------------------------------
+
+Follows events that came back as NEEDSAPPROVAL until a reviewer allows
+or denies them.
+
+- all outstanding event IDs live in one SQLite queue, so they survive
+  restarts and can be added from any script or process
+  (check_broadcasted_evm_txn.py and simulate_evm_txn.py do this when
+  APPROVAL_QUEUE_PATH is set)
+- a single loop polls whatever is due, POLL_CONCURRENCY at a time
+- the wait before an event is polled again grows with how long it has
+  been pending (AGE_FACTOR of its age, clamped between MIN_INTERVAL and
+  MAX_INTERVAL): fresh events are checked often, ones that sit in a
+  review queue for hours only now and then
+- callbacks fire once per event when it resolves
+
+The status endpoint is assumed to be GET <STATUS_URL>/<eventId>, returning
+the same body as the original evaluation, with `actionToTake` changing
+from "needsapproval" once the event has been reviewed.
+
+Usage:
+    python approval_poller.py add <event_id> [--db FILE]
+    python approval_poller.py run [--db FILE]
+    python approval_poller.py list [--db FILE]
+------------------------------------------------------------
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from web3firewall_client import DEFAULT_STATUS_URL, Web3FirewallClient, Web3FirewallError
+
+# === CONFIGURATION (EDIT BEFORE USE) ===
+WEB3FIREWALL_TOKEN = "YOUR_WEB3FIREWALL_BEARER_TOKEN_HERE"
+STATUS_URL = DEFAULT_STATUS_URL
+APPROVAL_QUEUE_PATH = "pending_approvals.sqlite"
+MIN_INTERVAL = 10          # seconds between polls of a fresh event
+MAX_INTERVAL = 900         # seconds between polls of a long-pending event
+AGE_FACTOR = 0.1           # poll again after 10% of the time the event has been pending
+POLL_CONCURRENCY = 4       # status requests in flight
+BATCH_SIZE = 100           # due events taken per round
+IDLE_WAIT = 5              # seconds to sleep when nothing is due
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_events (
+    event_id     TEXT PRIMARY KEY,
+    context      TEXT,
+    added_at     REAL NOT NULL,
+    next_poll_at REAL NOT NULL,
+    polls        INTEGER NOT NULL DEFAULT 0,
+    action       TEXT,
+    response     TEXT,
+    resolved_at  REAL
+);
+CREATE INDEX IF NOT EXISTS pending_due ON pending_events (next_poll_at) WHERE resolved_at IS NULL;
+"""
+
+def next_interval(age):
+    """Seconds until an event that has been pending for `age` seconds is polled again."""
+    interval = min(MAX_INTERVAL, max(MIN_INTERVAL, age * AGE_FACTOR))
+    # Spread events added at the same moment over time.
+    return interval * random.uniform(0.9, 1.1)
+
+class ApprovalPoller:
+    def __init__(self, path=APPROVAL_QUEUE_PATH, client=None, concurrency=POLL_CONCURRENCY):
+        self.path = path
+        self.client = client
+        self.concurrency = concurrency
+        self.callbacks = []
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def on_resolved(self, callback):
+        """Register `callback(event_id, action, response, context)`, called once per resolved event."""
+        self.callbacks.append(callback)
+        return callback
+
+    def add(self, event_id, context=None):
+        """Queue `event_id` for polling; adding an event twice is harmless."""
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO pending_events (event_id, context, added_at, next_poll_at) "
+                "VALUES (?, ?, ?, ?)",
+                (str(event_id), json.dumps(context), now, now + MIN_INTERVAL)
+            )
+
+    def pending(self):
+        """Return `[(event_id, added_at, polls), ...]` for unresolved events, oldest first."""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT event_id, added_at, polls FROM pending_events "
+                "WHERE resolved_at IS NULL ORDER BY added_at"
+            ).fetchall()
+
+    def _due(self, now):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT event_id, context, added_at FROM pending_events "
+                "WHERE resolved_at IS NULL AND next_poll_at <= ? ORDER BY next_poll_at LIMIT ?",
+                (now, BATCH_SIZE)
+            ).fetchall()
+
+    def _check(self, event_id):
+        try:
+            return self.client.get_event(event_id), None
+        except Web3FirewallError as e:
+            return None, e
+
+    def poll_due(self):
+        """Poll every event that is due; returns the number that resolved."""
+        now = time.time()
+        due = self._due(now)
+        if not due:
+            return 0
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            outcomes = list(pool.map(self._check, [event_id for event_id, _, _ in due]))
+
+        resolved = []
+        with self.lock, self.conn:
+            for (event_id, context, added_at), (response, error) in zip(due, outcomes):
+                action = str((response or {}).get("actionToTake", "")).lower()
+                if error is None and action and action != "needsapproval":
+                    self.conn.execute(
+                        "UPDATE pending_events SET action = ?, response = ?, resolved_at = ?, "
+                        "polls = polls + 1 WHERE event_id = ?",
+                        (action, json.dumps(response), now, event_id)
+                    )
+                    resolved.append((event_id, action, response, json.loads(context) if context else None))
+                    continue
+                if error is not None:
+                    print(f"[Web3Firewall] Could not poll event {event_id}: {error}")
+                self.conn.execute(
+                    "UPDATE pending_events SET next_poll_at = ?, polls = polls + 1 WHERE event_id = ?",
+                    (now + next_interval(now - added_at), event_id)
+                )
+
+        for event_id, action, response, context in resolved:
+            for callback in self.callbacks:
+                try:
+                    callback(event_id, action, response, context)
+                except Exception as e:
+                    print(f"[Web3Firewall] Callback for event {event_id} failed: {e}")
+        return len(resolved)
+
+    def run(self, stop=None):
+        """Poll until `stop` (a threading.Event) is set."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            self.poll_due()
+            with self.lock:
+                row = self.conn.execute(
+                    "SELECT MIN(next_poll_at) FROM pending_events WHERE resolved_at IS NULL"
+                ).fetchone()
+            # Sleep until the next event is due, but look again for newly added ones.
+            wait = IDLE_WAIT if row[0] is None else row[0] - time.time()
+            stop.wait(min(IDLE_WAIT, max(0.0, wait)))
+
+    def start(self, stop):
+        """Run the poll loop in a daemon thread; returns the thread."""
+        thread = threading.Thread(target=self.run, args=(stop,), daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+def print_resolution(event_id, action, response, context):
+    print(f"[Web3Firewall] Event {event_id} resolved: {action.upper()}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Poll Web3Firewall events waiting for manual approval.")
+    parser.add_argument("command", choices=("add", "run", "list"))
+    parser.add_argument("event_id", nargs="?")
+    parser.add_argument("--db", default=APPROVAL_QUEUE_PATH,
+                        help=f"SQLite queue file (default: {APPROVAL_QUEUE_PATH})")
+    args = parser.parse_args(argv)
+
+    if args.command == "add":
+        if not args.event_id:
+            parser.error("add needs an <event_id>")
+        ApprovalPoller(args.db).add(args.event_id)
+        print(f"[Web3Firewall] Event {args.event_id} queued for polling.")
+        return
+    if args.command == "list":
+        for event_id, added_at, polls in ApprovalPoller(args.db).pending():
+            print(f"{event_id}  pending {int(time.time() - added_at)}s  polled {polls}x")
+        return
+
+    client = Web3FirewallClient(WEB3FIREWALL_TOKEN, status_url=STATUS_URL, pool_size=POLL_CONCURRENCY)
+    poller = ApprovalPoller(args.db, client)
+    poller.on_resolved(print_resolution)
+    print(f"[Web3Firewall] Polling {len(poller.pending())} pending event(s). Press Ctrl-C to stop.")
+    try:
+        poller.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        poller.close()
+        client.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+------------------------------------------------------------
+ Web3Firewall — Resumable Historical Backfill
+------------------------------------------------------------
+
+Re-screens months of history for one address or a watchlist, e.g. for
+an audit:
+
+    python backfill.py --watchlist addresses.txt --days 180 --job audit-2025q1 --workers 4
+    python backfill.py 0xabc... --from-block 19000000 --to-block 19500000 --job audit --output audit.jsonl
+
+- the block range is split into partitions of --partition-size blocks
+- partitions are screened in parallel, one per worker process, using the
+  monitor's fetching (Etherscan, or --rpc-url), pre-filter and
+  submission pipeline
+- every finished partition is written to <job>/<first>-<last>.jsonl, which
+  doubles as its checkpoint: running the same command again skips
+  finished partitions and retries only failed or missing ones
+- verdicts of an unfinished partition are kept in
+  <job>/<first>-<last>.jsonl.partial, so its retry only submits the
+  transactions that did not get one
+- the block range is fixed in <job>/job.json when the job starts, so a
+  relative range (--days/--hours, or no --to-block) resumes over the same
+  blocks however far the head has moved since
+- once all partitions are done they are merged into one JSON Lines file
+  (default <job>/results.jsonl) ordered by block
+
+Rate limits given with --etherscan-rps / --web3firewall-rps are shared
+between the workers, as in monitor.py.
+------------------------------------------------------------
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+
+import monitor
+from ordered_pool import ordered_map
+
+PARTITION_SIZE = 50000     # blocks per partition (~1 week of mainnet blocks)
+BACKFILL_WORKERS = 4       # partitions screened in parallel
+MANIFEST = "job.json"
+
+_addresses = None
+_watch_index = None
+_options = None
+
+
+def partition_path(job_dir, first, last):
+    return os.path.join(job_dir, f"{first:012d}-{last:012d}.jsonl")
+
+
+def make_partitions(first_block, last_block, size):
+    return [(first, min(first + size - 1, last_block)) for first in range(first_block, last_block + 1, size)]
+
+
+def load_manifest(job_dir):
+    """Return the settings saved by an earlier run of the job, or None for a new job."""
+    path = os.path.join(job_dir, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_manifest(job_dir, settings):
+    os.makedirs(job_dir, exist_ok=True)
+    with open(os.path.join(job_dir, MANIFEST), "w") as f:
+        json.dump(settings, f, indent=2)
+
+
+def check_manifest(job_dir, saved, settings, args):
+    """
+    Check that a resumed job screens the same addresses the same way.
+
+    The block range is taken from the manifest, since a relative range
+    (--days/--hours, or no --to-block) moves with the chain head; only an
+    explicit --from-block/--to-block that disagrees with it is rejected.
+    """
+    changed = [key for key in ("addresses_sha256", "partition_size", "direction") if saved.get(key) != settings[key]]
+    if args.from_block is not None and args.from_block != saved["first_block"]:
+        changed.append("first_block")
+    if args.to_block is not None and args.to_block != saved["last_block"]:
+        changed.append("last_block")
+    if changed:
+        raise SystemExit(f"{job_dir} belongs to a backfill with different settings ({', '.join(changed)}); "
+                         f"use a new --job directory")
+
+
+def _init_worker(addresses, options):
+    global _addresses, _watch_index, _options
+    _addresses, _options = addresses, options
+    monitor.configure_rate_limits(options.etherscan_rps, options.web3firewall_rps)
+    monitor.configure_etherscan(options.fetch_concurrency, options.timeout)
+    monitor.configure_prefilter(options.prefilter)
+    _watch_index = monitor.watch_index_for(addresses, options)
+
+
+def fetch_partition(first, last):
+    """Return every watched transaction mined in blocks first..last; raises on fetch errors."""
+    directions = monitor.DIRECTIONS[_options.direction]
+    if _options.rpc_url:
+        return list(monitor.get_connector(_options).scan(first, last, _watch_index, directions))
+
+    def fetch(address):
+        return list(monitor.fetch_transactions(address, 0, first, monitor.LOW, directions, end_block=last))
+
+    txs = []
+    for address, rows, error in ordered_map(fetch, _addresses, _options.fetch_concurrency):
+        if error is not None:
+            raise RuntimeError(f"fetching {address}: {error}")
+        txs.extend(rows)
+    return txs
+
+
+def to_record(tx, response):
+    return {
+        "blockNumber": int(tx["blockNumber"]),
+        "transactionIndex": int(tx.get("transactionIndex") or 0),
+        "hash": tx["hash"],
+        "watched": tx["watched"],
+        "from": tx["from"],
+        "to": tx["to"],
+        "value": tx["value"],
+        "timeStamp": int(tx["timeStamp"]),
+        "action": str(response.get("actionToTake", "")).lower(),
+        "eventId": response.get("eventId"),
+        "response": response,
+    }
+
+
+def load_partial(path):
+    """Return `{(hash, watched): record}` from a partition's partial checkpoint, if an earlier attempt left one."""
+    records = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn last line of an interrupted attempt
+            records[(record["hash"].lower(), record["watched"])] = record
+    return records
+
+
+def run_partition(first, last, job_dir):
+    """Screen one partition and write its results; returns the number of transactions."""
+    path = partition_path(job_dir, first, last)
+    # Verdicts are appended to <partition>.partial as they arrive, so a retry
+    # after failed submissions (or a crash) only submits what is missing.
+    partial_path = path + ".partial"
+    done = load_partial(partial_path)
+    txs = fetch_partition(first, last)
+    records = [done[key] for key in {(tx["hash"].lower(), tx["watched"]) for tx in txs} if key in done]
+    pending = (tx for tx in txs if (tx["hash"].lower(), tx["watched"]) not in done)
+    errors = 0
+    with open(partial_path, "a") as partial:
+        for tx, response, error in monitor.submit_transactions(pending, _options.concurrency, _options.timeout):
+            if error is not None:
+                errors += 1
+                continue
+            record = to_record(tx, response)
+            partial.write(json.dumps(record) + "\n")
+            records.append(record)
+        partial.flush()
+    if errors:
+        raise RuntimeError(f"{errors} of {len(txs)} submissions failed")
+
+    records.sort(key=lambda record: (record["blockNumber"], record["transactionIndex"], record["watched"]))
+    with open(path + ".tmp", "w") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    os.replace(path + ".tmp", path)
+    os.remove(partial_path)
+    return len(records)
+
+
+def merge_partitions(job_dir, partitions, output):
+    """Concatenate finished partitions (each sorted, disjoint ranges) into `output` in block order."""
+    total = 0
+    with open(output + ".tmp", "w") as out:
+        for first, last in partitions:
+            with open(partition_path(job_dir, first, last), "r") as f:
+                for line in f:
+                    out.write(line)
+                    total += 1
+    os.replace(output + ".tmp", output)
+    return total
+
+
+def resolve_range(args):
+    """Return `(first_block, last_block)` from --from-block/--to-block or --days/--hours."""
+    monitor.configure_etherscan(args.fetch_concurrency, args.timeout)
+    if args.rpc_url:
+        connector = monitor.get_connector(args)
+        head = connector.get_block_number
+        by_timestamp = connector.get_block_by_timestamp
+    else:
+        head = monitor.get_block_number
+        by_timestamp = monitor.get_block_by_timestamp
+    last_block = args.to_block if args.to_block is not None else head()
+    if args.from_block is not None:
+        first_block = args.from_block
+    else:
+        hours = (args.days or 0) * 24 + (args.hours or 0)
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
+        first_block = by_timestamp(int(cutoff.timestamp()))
+    return first_block, last_block
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Re-screen a historical block range with Web3Firewall.")
+    parser.add_argument("address", metavar="ethereum_address", nargs="?")
+    parser.add_argument("--watchlist", metavar="FILE", help="backfill every address listed in FILE")
+    parser.add_argument("--job", required=True, metavar="DIR",
+                        help="directory for partition checkpoints; rerun with the same DIR to resume")
+    parser.add_argument("--from-block", type=int)
+    parser.add_argument("--to-block", type=int, help="last block to screen (default: the current head)")
+    parser.add_argument("--days", type=float, help="start this many days back instead of --from-block")
+    parser.add_argument("--hours", type=float, help="start this many hours back instead of --from-block")
+    parser.add_argument("--partition-size", type=monitor.positive_int, default=PARTITION_SIZE,
+                        help=f"blocks per partition (default: {PARTITION_SIZE})")
+    parser.add_argument("--workers", type=monitor.positive_int, default=BACKFILL_WORKERS,
+                        help=f"partitions screened in parallel (default: {BACKFILL_WORKERS})")
+    parser.add_argument("--output", metavar="FILE", help="merged results (default: <job>/results.jsonl)")
+    parser.add_argument("--direction", choices=sorted(monitor.DIRECTIONS), default="in")
+    parser.add_argument("--rpc-url", default=monitor.RPC_URL)
+    parser.add_argument("--rpc-batch-size", type=monitor.positive_int, default=monitor.RPC_BATCH_SIZE)
+    parser.add_argument("--fetch-concurrency", type=monitor.positive_int, default=monitor.ETHERSCAN_CONCURRENCY)
+    parser.add_argument("--prefilter", metavar="RULES", default=monitor.PREFILTER_RULES_PATH)
+    parser.add_argument("--etherscan-rps", type=float, default=monitor.ETHERSCAN_RATE_LIMIT)
+    parser.add_argument("--web3firewall-rps", type=float, default=monitor.WEB3FIREWALL_RATE_LIMIT)
+    parser.add_argument("--concurrency", type=monitor.positive_int, default=monitor.SUBMIT_CONCURRENCY)
+    parser.add_argument("--timeout", type=float, default=monitor.REQUEST_TIMEOUT)
+    args = parser.parse_args(argv)
+    if bool(args.address) == bool(args.watchlist):
+        parser.error("give either an <ethereum_address> or --watchlist FILE")
+    if args.from_block is None and not (args.days or args.hours):
+        parser.error("give --from-block or --days/--hours")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    addresses = monitor.load_watchlist(args.watchlist) if args.watchlist else [args.address.lower()]
+    job_dir = args.job
+    settings = {
+        "addresses_sha256": hashlib.sha256("\n".join(sorted(addresses)).encode()).hexdigest(),
+        "addresses": len(addresses),
+        "partition_size": args.partition_size,
+        "direction": args.direction,
+    }
+    saved = load_manifest(job_dir)
+    if saved is not None:
+        check_manifest(job_dir, saved, settings, args)
+        first_block, last_block = saved["first_block"], saved["last_block"]
+    else:
+        first_block, last_block = resolve_range(args)
+        if first_block > last_block:
+            raise SystemExit(f"Nothing to do: block range {first_block}..{last_block} is empty.")
+        save_manifest(job_dir, dict(settings, first_block=first_block, last_block=last_block))
+    partitions = make_partitions(first_block, last_block, args.partition_size)
+    todo = [p for p in partitions if not os.path.exists(partition_path(job_dir, *p))]
+    print(f"Backfilling {len(addresses)} addresses over blocks {first_block}..{last_block}: "
+          f"{len(partitions)} partitions, {len(partitions) - len(todo)} already done.")
+
+    workers = min(args.workers, len(todo)) or 1
+    # Every worker paces itself, so give each its share of the API rate limits.
+    args.etherscan_rps /= workers
+    args.web3firewall_rps /= workers
+    failed = 0
+    started = time.monotonic()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(addresses, args)) as pool:
+        futures = {pool.submit(run_partition, first, last, job_dir): (first, last) for first, last in todo}
+        for done, future in enumerate(as_completed(futures), 1):
+            first, last = futures[future]
+            try:
+                count = future.result()
+                print(f"[{done}/{len(todo)}] blocks {first}..{last}: {count} transactions", flush=True)
+            except Exception as e:
+                failed += 1
+                print(f"[{done}/{len(todo)}] blocks {first}..{last} failed: {e}", flush=True)
+
+    if failed:
+        print(f"{failed} partition(s) failed; run the same command again to retry them.")
+        raise SystemExit(1)
+    output = args.output or os.path.join(job_dir, "results.jsonl")
+    total = merge_partitions(job_dir, partitions, output)
+    print(f"Done in {time.monotonic() - started:.1f}s: {total} transactions written to {output}.")
+
+
+if __name__ == "__main__":
+    main()
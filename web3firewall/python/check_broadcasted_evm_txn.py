@@ -17,12 +17,21 @@ Author: Web3Firewall Engineering
 License: Apache 2.0
 """
 
-import requests
 import json
 
+from approval_poller import ApprovalPoller
+from prefilter import Prefilter
+from verdict_cache import VerdictCache
+from web3firewall_client import Web3FirewallClient, Web3FirewallError
+
 # === CONFIGURATION (EDIT BEFORE USE) ===
 WEB3FIREWALL_API_URL = "https://api.web3firewall.io/api/v1/policy/event"
 WEB3FIREWALL_TOKEN = "YOUR_WEB3FIREWALL_BEARER_TOKEN_HERE"
+VERDICT_CACHE_PATH = None  # e.g. "verdicts.sqlite" to reuse verdicts across runs and processes
+REQUEST_TIMEOUT = 10       # seconds
+MAX_RETRIES = 3            # retries on timeouts, 429 and 5xx
+PREFILTER_RULES_PATH = None  # e.g. "prefilter_rules.json" to decide obvious cases locally (see prefilter.py)
+APPROVAL_QUEUE_PATH = None # e.g. "pending_approvals.sqlite" to hand NEEDSAPPROVAL events to approval_poller.py
 
 # === SAMPLE TX PAYLOAD (REPLACE OR INTEGRATE INTO YOUR PIPELINE) ===
 transaction_payload = {
@@ -44,22 +53,45 @@ transaction_payload = {
 }
 
 # === WEB3FIREWALL API INTERACTION ===
-def evaluate_transaction(tx: dict):
-    headers = {
-        "Authorization": f"Bearer {WEB3FIREWALL_TOKEN}",
-        "Content-Type": "application/json"
-    }
+client = Web3FirewallClient(
+    WEB3FIREWALL_TOKEN,
+    api_url=WEB3FIREWALL_API_URL,
+    timeout=REQUEST_TIMEOUT,
+    max_retries=MAX_RETRIES,
+    cache=VerdictCache(path=VERDICT_CACHE_PATH)
+)
+
+prefilter = Prefilter.from_file(PREFILTER_RULES_PATH) if PREFILTER_RULES_PATH else None
+_approval_queue = None
+_verdict_listeners = []
+
+def add_verdict_listener(listener):
+    """Call `listener(tx, response)` for every verdict evaluate_transaction returns (e.g. auto_quarantine.py)."""
+    _verdict_listeners.append(listener)
 
+def queue_for_approval(event_id, tx):
+    """Hand a NEEDSAPPROVAL event to the approval poller's queue, if one is configured."""
+    global _approval_queue
+    if not APPROVAL_QUEUE_PATH or event_id in (None, "N/A"):
+        return
+    if _approval_queue is None:
+        _approval_queue = ApprovalPoller(APPROVAL_QUEUE_PATH)
+    _approval_queue.add(event_id, context={"kind": tx.get("kind"), "data": tx.get("data")})
+    print(f"[Web3Firewall] Event {event_id} queued for polling in {APPROVAL_QUEUE_PATH}.")
+
+def evaluate_transaction(tx: dict):
+    """Evaluate and print the verdict for `tx`; returns the response, or None on failure."""
+    result = prefilter.check(tx) if prefilter else None
+    if result is not None:
+        print(f"[Web3Firewall] Action: {result['actionToTake'].upper()} (local rule: {result['reason']})")
+        for listener in _verdict_listeners:
+            listener(tx, result)
+        return result
     try:
-        response = requests.post(WEB3FIREWALL_API_URL, headers=headers, json=tx)
-        response.raise_for_status()
-        result = response.json()
-    except requests.RequestException as e:
+        result = client.evaluate(tx)
+    except Web3FirewallError as e:
         print(f"[Web3Firewall] Request failed: {e}")
-        return
-    except ValueError:
-        print("[Web3Firewall] Failed to parse JSON response:", response.text)
-        return
+        return None
 
     action = result.get("actionToTake", "").lower()
     event_id = result.get("eventId", "N/A")
@@ -69,10 +101,14 @@ def evaluate_transaction(tx: dict):
 
     if action == "needsapproval":
         print("[Web3Firewall] Manual review required. Check dashboard or use this Event ID to poll later.")
+        queue_for_approval(event_id, tx)
     elif action in ("allow", "deny"):
         print("[Web3Firewall] Automated decision returned.")
     else:
         print(f"[Web3Firewall] Unrecognized action: {action}")
+    for listener in _verdict_listeners:
+        listener(tx, result)
+    return result
 
 # === MAIN ENTRYPOINT ===
 if __name__ == "__main__":
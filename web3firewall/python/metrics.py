@@ -0,0 +1,251 @@
+"""
+------------------------------------------------------------
+ Web3Firewall — Pipeline Metrics and Profiling
+------------------------------------------------------------
+
+Stage-level instrumentation for monitor.py (`--metrics FILE`,
+`--profile FILE`).
+
+- a latency histogram per pipeline stage: fetch (one Etherscan or
+  JSON-RPC request), normalize (txlist row -> event), prefilter, submit
+  (one Web3Firewall evaluation, including retries and rate-limit waits)
+  and verdict (reporting, state store and listeners)
+- counters for transactions fetched, skipped and decided, stage errors,
+  rate-limit replies and addresses whose fetch or submission failed
+- exported as Prometheus text when the file name ends in .prom (e.g. for
+  node_exporter's textfile collector), otherwise as a JSON summary with
+  count, mean and estimated p50/p95/p99 per stage
+- profile(): a cProfile of the calling thread, or a wall-clock sampling
+  profile of every thread written as collapsed stacks (input for
+  flamegraph.pl or speedscope)
+------------------------------------------------------------
+"""
+
+import bisect
+import cProfile
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+PREFIX = "web3firewall_"
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1, 2.5, 5, 10, 30, 60)   # seconds, upper bounds
+SAMPLE_INTERVAL = 0.005   # seconds between stack samples
+PROFILE_MODES = ("sample", "cprofile")
+
+
+def _labels(labels):
+    return ",".join(f'{name}="{value}"' for name, value in labels)
+
+
+def _name(name, labels):
+    return f"{name}{{{_labels(labels)}}}" if labels else name
+
+
+def process_path(path):
+    """Return `path`, or `path` with this process's PID added when running as a worker process."""
+    if not path or multiprocessing.parent_process() is None:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{os.getpid()}{ext}"
+
+
+class Histogram:
+    """Fixed-bucket latency histogram, as Prometheus keeps it."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # the last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Estimate the `q` quantile by interpolating inside its bucket; None without samples."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - seen) / count)
+            seen += count
+        return self.max
+
+
+class Metrics:
+    """Thread-safe counters and per-stage histograms for one process."""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+        self.started = time.time()
+
+    def reset(self):
+        """Drop everything recorded so far, e.g. between benchmark runs."""
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.started = time.time()
+
+    def count(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, stage, seconds, **labels):
+        key = (stage, tuple(sorted(labels.items())))
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(seconds)
+
+    @contextmanager
+    def timer(self, stage, **labels):
+        """Time the block as one `stage` observation; exceptions are also counted as errors."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.count("errors", stage=stage)
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - started, **labels)
+
+    def summary(self):
+        """Return a JSON-serializable summary; latencies are in seconds."""
+        elapsed = time.time() - self.started
+        with self.lock:
+            stages = {
+                _name(stage, labels): {
+                    "count": histogram.count,
+                    "per_second": histogram.count / elapsed if elapsed else 0.0,
+                    "mean": histogram.sum / histogram.count,
+                    "p50": histogram.quantile(0.50),
+                    "p95": histogram.quantile(0.95),
+                    "p99": histogram.quantile(0.99),
+                    "max": histogram.max,
+                }
+                for (stage, labels), histogram in sorted(self.histograms.items()) if histogram.count
+            }
+            counters = {_name(name, labels): value for (name, labels), value in sorted(self.counters.items())}
+        return {"elapsed_seconds": elapsed, "stages": stages, "counters": counters}
+
+    def to_prometheus(self):
+        """Return every metric in the Prometheus text exposition format."""
+        lines = [f"# TYPE {PREFIX}stage_seconds histogram"]
+        with self.lock:
+            for (stage, labels), histogram in sorted(self.histograms.items()):
+                labels = (("stage", stage),) + labels
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                    cumulative += count
+                    lines.append(f"{PREFIX}stage_seconds_bucket{{{_labels(labels + (('le', bound),))}}} {cumulative}")
+                lines.append(f"{PREFIX}stage_seconds_sum{{{_labels(labels)}}} {histogram.sum}")
+                lines.append(f"{PREFIX}stage_seconds_count{{{_labels(labels)}}} {histogram.count}")
+            names = sorted({name for name, _ in self.counters})
+            for name in names:
+                lines.append(f"# TYPE {PREFIX}{name}_total counter")
+                for (counter, labels), value in sorted(self.counters.items()):
+                    if counter == name:
+                        lines.append(f"{PREFIX}{_name(name + '_total', labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def format_summary(self):
+        """Return one human-readable line per stage, in milliseconds."""
+        return [
+            f"{stage}: n={stats['count']} mean={stats['mean'] * 1000:.1f}ms p50={stats['p50'] * 1000:.1f}ms "
+            f"p95={stats['p95'] * 1000:.1f}ms p99={stats['p99'] * 1000:.1f}ms"
+            for stage, stats in self.summary()["stages"].items()
+        ]
+
+    def write(self, path):
+        """Atomically write Prometheus text (*.prom) or a JSON summary to `path`."""
+        if path.endswith(".prom"):
+            text = self.to_prometheus()
+        else:
+            text = json.dumps(self.summary(), indent=2) + "\n"
+        with open(path + ".tmp", "w") as f:
+            f.write(text)
+        os.replace(path + ".tmp", path)
+
+
+class StackSampler:
+    """Samples the Python stack of every other thread into collapsed-stack counts."""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self.stopping.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopping.set()
+        self.thread.join()
+
+    def write(self, path):
+        """Write `stack count` lines, heaviest first."""
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+@contextmanager
+def profile(path, mode="sample"):
+    """
+    Profile the enclosed block into `path`; does nothing when `path` is empty.
+
+    "cprofile" covers the calling thread only (load with pstats); "sample"
+    covers every thread, including submission and fetch pools, and shows
+    where wall-clock time goes, waiting included.
+    """
+    if not path:
+        yield
+        return
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path)
+        return
+    sampler = StackSampler().start()
+    try:
+        yield
+    finally:
+        sampler.stop()
+        sampler.write(path)
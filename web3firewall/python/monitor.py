@@ -11,9 +11,92 @@ INSTRUCTIONS:
 
 1. Set your credentials below.
 2. Run from terminal:
-    python monitor.py <ethereum_address> <lookback_hours>
+    python monitor.py <ethereum_address> <lookback_hours> [--concurrency N] [--timeout SECONDS]
+
+   or, to watch many addresses from one process:
+    python monitor.py --watchlist addresses.txt <lookback_hours> [--workers N] [--shard K/N]
 
 3. All transactions are submitted to Web3Firewall for risk assessment.
+   Submissions run in parallel over a shared keep-alive connection pool
+   (default: SUBMIT_CONCURRENCY in flight); results are printed in the
+   same order the transactions were fetched.
+
+WATCHLIST MODE:
+
+   The watchlist file holds one address per line; blank lines and lines
+   starting with '#' are ignored. Addresses are fetched ETHERSCAN_CONCURRENCY
+   at a time and all their transactions share the same submission pool.
+   --workers splits the list across that many processes (one connection
+   pool each); --shard K/N keeps only every Nth address starting at K, so
+   several hosts can split one file between them.
+
+   For very large watchlists, prebuild a compact index once with
+   `python address_index.py build addresses.txt addresses.idx` and pass
+   the .idx file to --watchlist; block scans match against the
+   memory-mapped index directly (with --workers or --shard, each worker
+   gets a compact in-memory slice of it).
+   --direction in|out|both picks deposits (default), withdrawals or both.
+
+INCREMENTAL RUNS:
+
+   Pass --state monitor_state.sqlite (either mode) to keep a checkpoint of
+   the last processed block per address and every evaluated tx hash with
+   its verdict. Later runs only fetch blocks from REORG_DEPTH below the
+   checkpoint onwards and never resubmit a hash; an interrupted run can
+   simply be restarted. With --rpc-url the block scan keeps one checkpoint
+   for the whole watch set instead of one per address.
+
+DAEMON MODE:
+
+   Add --follow (either mode) to keep running after the initial lookback:
+   every POLL_INTERVAL seconds the chain head is read and only blocks since
+   the last iteration are fetched and screened, with connections and state
+   kept warm. The last REORG_DEPTH blocks are re-checked each time so
+   reorged transactions are caught and dropped ones reported. SIGINT or
+   SIGTERM stop the daemon after the current iteration.
+
+JSON-RPC NODES:
+
+   --rpc-url http://localhost:8545 (or RPC_URL) replaces Etherscan with
+   your own node: block ranges are fetched with batched
+   eth_getBlockByNumber calls, RPC_CONCURRENCY batches at a time, and
+   every block is matched against all watched addresses in one pass.
+
+RATE LIMITS:
+
+   Etherscan and Web3Firewall calls are paced by per-process token buckets
+   (--etherscan-rps / --web3firewall-rps, divided between --workers).
+   Rate-limit replies pause and slow the bucket and the call is retried
+   instead of being dropped; timeouts, connection errors and 5xx replies
+   (and, for JSON-RPC batches, 429s and blocks the node lacks) are
+   retried with jittered backoff (MAX_RETRIES). Fresh work (incremental
+   fetches, transactions younger than FRESH_TX_AGE) is served ahead of
+   backfill.
+
+LOCAL PRE-FILTER:
+
+   --prefilter prefilter_rules.json (or PREFILTER_RULES_PATH) decides
+   deny-listed, internal, allow-listed, known-counterparty and dust
+   transactions locally instead of calling the API; the matching rule is
+   reported and stored as the verdict's "reason". See prefilter.py.
+
+INSTRUMENTATION:
+
+   --metrics metrics.json (or METRICS_PATH) records counters and latency
+   histograms for every pipeline stage (fetch, normalize, prefilter,
+   submit, verdict) and writes them at exit as a JSON summary, or in the
+   Prometheus text format if the file name ends in .prom; --follow
+   rewrites the file after every iteration. --profile FILE captures a
+   wall-clock sampling profile of all threads as collapsed stacks
+   (--profile-mode cprofile: a cProfile of the main thread instead).
+   With --workers, every worker process writes its own FILE.<pid>.
+   See metrics.py.
+
+HISTORICAL BACKFILL:
+
+   To re-screen months of history, use backfill.py: it splits the block
+   range into partitions, screens them in parallel worker processes and
+   can be resumed after a failure. See its docstring.
 
 Get a free Etherscan API key at:
     https://etherscan.io/myapikey
@@ -29,43 +112,328 @@ WEB3FIREWALL_TOKEN = "YOUR_WEB3FIREWALL_BEARER_TOKEN_HERE"
 
 # === STATIC CONFIGURATION ===
 WEB3FIREWALL_API_URL = "https://api.web3firewall.io/api/v1/policy/event"
+ETHERSCAN_API_URL = "https://api.etherscan.io/api"
+ETHERSCAN_PAGE_SIZE = 1000  # rows per txlist request
+SUBMIT_CONCURRENCY = 8   # Web3Firewall requests kept in flight at once
+ETHERSCAN_CONCURRENCY = 4  # addresses fetched in parallel in watchlist mode
+REQUEST_TIMEOUT = 10     # seconds, applied to every HTTP request
+MAX_RETRIES = 3          # Etherscan, JSON-RPC and Web3Firewall retries on timeouts, connection errors and 5xx
+RETRY_BACKOFF = 0.5      # seconds, base of the exponential backoff between those retries
+VERDICT_CACHE_PATH = None  # e.g. "verdicts.sqlite" to share cached verdicts with the other clients
+ETHERSCAN_RATE_LIMIT = 5     # requests/second per API key (free tier); 0 = unlimited
+WEB3FIREWALL_RATE_LIMIT = 0  # requests/second; 0 = unlimited, 429s still slow us down
+ETHERSCAN_MAX_RETRIES = 5    # rate-limited Etherscan calls retried before giving up
+FRESH_TX_AGE = 600           # seconds; younger transactions are submitted ahead of backfill
+RPC_URL = None               # e.g. "http://localhost:8545" to scan blocks from your own node instead of Etherscan
+RPC_BATCH_SIZE = 25          # blocks per eth_getBlockByNumber batch
+RPC_CONCURRENCY = 4          # batches in flight
+POLL_INTERVAL = 12       # seconds between head checks in --follow mode (~1 block)
+REORG_DEPTH = 12         # recent blocks re-fetched on every run or --follow iteration
+PREFILTER_RULES_PATH = None  # e.g. "prefilter_rules.json" to decide obvious cases locally (see prefilter.py)
+METRICS_PATH = None          # e.g. "metrics.json" or "monitor.prom" to export stage metrics (see metrics.py)
 
 # === DO NOT MODIFY BELOW THIS LINE ===
 
+import argparse
+import multiprocessing
+import os
+import random
+import re
+import signal
 import sys
-import requests
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
 
-def get_recent_transactions(address, cutoff_timestamp):
-    params = {
-        "module": "account",
-        "action": "txlist",
-        "address": address,
-        "startblock": 0,
-        "endblock": 99999999,
-        "sort": "desc",
-        "apikey": ETHERSCAN_API_KEY
-    }
+import requests
+from requests.adapters import HTTPAdapter
 
-    try:
-        response = requests.get("https://api.etherscan.io/api", params=params)
-        response.raise_for_status()
-        data = response.json()
+from address_index import AddressIndex
+from metrics import PROFILE_MODES, Metrics, process_path, profile
+from ordered_pool import ordered_map
+from prefilter import Prefilter
+from rate_limit import HIGH, LOW, TokenBucket
+from rpc_connector import JsonRpcConnector
+from state_store import StateStore
+from verdict_cache import VerdictCache
+from web3firewall_client import (MAX_BACKOFF, RETRY_STATUSES, TRANSIENT_ERRORS, Web3FirewallClient,
+                                 retry_after_seconds)
+
+_session = None
+_session_pool_size = 0
+_client = None
+_client_lock = threading.Lock()
+_connector = None
+_rate_limits = {"etherscan": ETHERSCAN_RATE_LIMIT, "web3firewall": WEB3FIREWALL_RATE_LIMIT}
+_etherscan = {"concurrency": ETHERSCAN_CONCURRENCY, "timeout": REQUEST_TIMEOUT}
+_limiters = {}
+_limiters_lock = threading.Lock()
+_verdict_listeners = []
+_metrics = Metrics()
+_prefilter = None
+_prefilter_path = PREFILTER_RULES_PATH
+_prefilter_lock = threading.Lock()
+
+class EtherscanError(Exception):
+    """Raised when Etherscan returns an error or keeps rate-limiting us."""
+
+def add_verdict_listener(listener):
+    """
+    Call `listener(tx, response)` for every verdict this process receives.
+
+    Listeners run on the main thread as results are reported, so they should
+    hand slow work off (see Fireblocks/Python/auto_quarantine.py). Register
+    them before any worker processes are started.
+    """
+    _verdict_listeners.append(listener)
+
+def configure_rate_limits(etherscan_rps=None, web3firewall_rps=None):
+    """Set this process's per-upstream request rates; must run before the first request."""
+    if etherscan_rps is not None:
+        _rate_limits["etherscan"] = etherscan_rps
+    if web3firewall_rps is not None:
+        _rate_limits["web3firewall"] = web3firewall_rps
+
+def configure_etherscan(concurrency=None, timeout=None):
+    """Size the Etherscan connection pool for `concurrency` parallel fetches and set its request timeout."""
+    if concurrency is not None:
+        _etherscan["concurrency"] = concurrency
+    if timeout is not None:
+        _etherscan["timeout"] = timeout
+    get_session(_etherscan["concurrency"])
 
+def configure_prefilter(path):
+    """
+    Use the rules in `path` (None disables the pre-filter) for this process.
+
+    The rules are loaded right away, so call this on the main thread before
+    screening starts rather than leaving it to the submission threads.
+    """
+    global _prefilter, _prefilter_path
+    with _prefilter_lock:
+        if path != _prefilter_path or (path and _prefilter is None):
+            _prefilter = Prefilter.from_file(path) if path else None
+            _prefilter_path = path
+
+def get_prefilter():
+    """Return this process's Prefilter, or None when no rules are configured."""
+    global _prefilter
+    if _prefilter is None and _prefilter_path:
+        with _prefilter_lock:
+            # Only one thread loads PREFILTER_RULES_PATH if nothing configured it yet.
+            if _prefilter is None and _prefilter_path:
+                _prefilter = Prefilter.from_file(_prefilter_path)
+    return _prefilter
+
+def get_metrics():
+    """Return this process's stage metrics."""
+    return _metrics
+
+def get_limiter(name):
+    """Return this process's token bucket for the `name` upstream."""
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = TokenBucket(_rate_limits[name] or None, name=name)
+        return _limiters[name]
+
+def _forget_process_state():
+    # Forked workers must not share the parent's sockets, SQLite handles or buckets.
+    global _session, _session_pool_size, _client, _client_lock, _limiters_lock, _connector, _metrics
+    global _prefilter_lock
+    _session, _session_pool_size, _client, _connector = None, 0, None, None
+    _metrics = Metrics()
+    _client_lock, _limiters_lock, _prefilter_lock = threading.Lock(), threading.Lock(), threading.Lock()
+    _limiters.clear()
+
+os.register_at_fork(after_in_child=_forget_process_state)
+
+def get_session(pool_size=None):
+    """Return the process-wide keep-alive Etherscan session, sized for `pool_size` workers."""
+    global _session, _session_pool_size
+    pool_size = pool_size or _etherscan["concurrency"]
+    if _session is None:
+        _session = requests.Session()
+    if pool_size > _session_pool_size:
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(pool_size, 10))
+        _session.mount("https://", adapter)
+        _session.mount("http://", adapter)
+        _session_pool_size = pool_size
+    return _session
+
+def get_client(pool_size=SUBMIT_CONCURRENCY, timeout=REQUEST_TIMEOUT):
+    """Return this process's Web3Firewall client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = Web3FirewallClient(
+                WEB3FIREWALL_TOKEN,
+                api_url=WEB3FIREWALL_API_URL,
+                timeout=timeout,
+                max_retries=MAX_RETRIES,
+                backoff=RETRY_BACKOFF,
+                pool_size=pool_size,
+                cache=VerdictCache(path=VERDICT_CACHE_PATH),
+                limiter=get_limiter("web3firewall")
+            )
+        return _client
+
+def get_connector(options):
+    """Return this process's JSON-RPC connector for `options.rpc_url`."""
+    global _connector
+    if _connector is None:
+        _connector = JsonRpcConnector(
+            options.rpc_url, batch_size=options.rpc_batch_size, concurrency=RPC_CONCURRENCY,
+            timeout=options.timeout, metrics=_metrics, max_retries=MAX_RETRIES, backoff=RETRY_BACKOFF
+        )
+    return _connector
+
+def is_rate_limited(data):
+    """Etherscan signals rate limiting in the body of an HTTP 200 reply."""
+    return data.get("status") == "0" and "rate limit" in str(data.get("result", "")).lower()
+
+def etherscan_get(params, priority=HIGH):
+    """
+    Call the Etherscan API and return the decoded JSON body.
+
+    Calls are paced by the Etherscan token bucket. Rate-limit replies pause
+    the bucket and are retried, so pages are never silently dropped; after
+    ETHERSCAN_MAX_RETRIES an EtherscanError is raised instead. Timeouts,
+    connection errors and 5xx replies are retried MAX_RETRIES times with
+    full-jitter exponential backoff, as Web3FirewallClient does. Every
+    failed attempt counts as a fetch error, every rate-limit reply as
+    throttled.
+    """
+    limiter = get_limiter("etherscan")
+    query = dict(params, apikey=ETHERSCAN_API_KEY)
+    attempt = 0
+    throttled = 0
+    while True:
+        limiter.acquire(priority)
+        try:
+            # The timer counts transport errors; failed replies are counted below.
+            with _metrics.timer("fetch", source="etherscan"):
+                response = get_session().get(ETHERSCAN_API_URL, params=query, timeout=_etherscan["timeout"])
+        except TRANSIENT_ERRORS as e:
+            error = EtherscanError(f"request failed: {e}")
+        else:
+            data = response.json() if response.ok else None
+            if response.status_code == 429 or (data is not None and is_rate_limited(data)):
+                _metrics.count("throttled", source="etherscan")
+                if throttled >= ETHERSCAN_MAX_RETRIES:
+                    _metrics.count("errors", stage="fetch")
+                    raise EtherscanError(f"still rate limited after {ETHERSCAN_MAX_RETRIES} retries")
+                limiter.penalize(retry_after_seconds(response))
+                throttled += 1
+                continue
+            if not response.ok:
+                _metrics.count("errors", stage="fetch")
+            if response.status_code not in RETRY_STATUSES:
+                response.raise_for_status()
+                limiter.reward()
+                return data
+            error = EtherscanError(f"HTTP {response.status_code}: {response.text[:200]}")
+
+        if attempt >= MAX_RETRIES:
+            raise error
+        time.sleep(min(random.uniform(0, RETRY_BACKOFF * (2 ** attempt)), MAX_BACKOFF))
+        attempt += 1
+
+def get_block_by_timestamp(timestamp):
+    """Return the first block mined at or after `timestamp`, or 0 if Etherscan can't tell."""
+    data = etherscan_get({
+        "module": "block",
+        "action": "getblocknobytime",
+        "timestamp": int(timestamp),
+        "closest": "after"
+    })
+    if data.get("status") != "1":
+        return 0
+    return int(data["result"])
+
+def get_block_number():
+    """Return the current chain head as seen by Etherscan."""
+    data = etherscan_get({"module": "proxy", "action": "eth_blockNumber"})
+    return int(data["result"], 16)
+
+def iter_transaction_pages(address, cutoff_timestamp, page_size=ETHERSCAN_PAGE_SIZE, start_block=None,
+                           priority=HIGH, end_block=None):
+    """
+    Yield `txlist` pages for `address`, newest first, back to `cutoff_timestamp`.
+
+    The query is bounded below by `start_block` or, if not given, by the block
+    mined at the cutoff, and above by `end_block` (default: the head). Instead of
+    Etherscan's page numbers (capped at 10k rows in total) each request moves
+    the `endblock` cursor down to the oldest block seen so far, so windows of
+    any size are returned in full. Rows that straddle two pages are dropped
+    from the second one.
+    """
+    if start_block is None:
+        start_block = get_block_by_timestamp(cutoff_timestamp)
+    if end_block is None:
+        end_block = 99999999
+    page = 1
+    boundary_hashes = set()
+
+    while True:
+        data = etherscan_get({
+            "module": "account",
+            "action": "txlist",
+            "address": address,
+            "startblock": start_block,
+            "endblock": end_block,
+            "page": page,
+            "offset": page_size,
+            "sort": "desc"
+        }, priority)
         if data["status"] != "1":
-            print("No transactions found or API error:", data.get("message"))
-            return []
+            # Etherscan reports an empty result as status "0" as well.
+            if data.get("message") == "No transactions found":
+                return
+            _metrics.count("errors", stage="fetch")
+            raise EtherscanError(f"{data.get('message')}: {data.get('result')}")
 
-        return [
-            tx for tx in data["result"]
-            if tx["to"] and tx["to"].lower() == address.lower() and int(tx["timeStamp"]) >= cutoff_timestamp
+        rows = data["result"]
+        fresh = [
+            tx for tx in rows
+            if tx["hash"] not in boundary_hashes and int(tx["timeStamp"]) >= cutoff_timestamp
         ]
+        if fresh:
+            yield fresh
+        if len(rows) < page_size or int(rows[-1]["timeStamp"]) < cutoff_timestamp:
+            return
 
-    except Exception as e:
-        print("Error fetching transactions from Etherscan:", e)
-        return []
+        last_block = int(rows[-1]["blockNumber"])
+        if last_block == end_block:
+            # A single block filled the page; step through it by page number.
+            page += 1
+        else:
+            end_block = last_block
+            page = 1
+            boundary_hashes.clear()
+        boundary_hashes.update(tx["hash"] for tx in rows if int(tx["blockNumber"]) == last_block)
+
+def fetch_transactions(address, cutoff_timestamp, start_block=None, priority=HIGH, directions=("to",),
+                       end_block=None):
+    """
+    Stream transactions to `address` mined at or after `cutoff_timestamp` (and up to
+    `end_block`, if given); raises on errors.
 
-def send_to_web3firewall(tx):
+    `directions` selects which side of the transaction must be `address`:
+    ("to",) for deposits, ("from",) for withdrawals or both. Every row is
+    tagged with the matched address under "watched".
+    """
+    address = address.lower()
+    for page in iter_transaction_pages(address, cutoff_timestamp, start_block=start_block, priority=priority,
+                                       end_block=end_block):
+        for tx in page:
+            if any((tx.get(direction) or "").lower() == address for direction in directions):
+                tx["watched"] = address
+                yield tx
+
+def build_event(tx):
+    """Convert an Etherscan txlist row into a `transaction:broadcasted` event."""
     tx_time = datetime.utcfromtimestamp(int(tx["timeStamp"])).replace(tzinfo=timezone.utc).isoformat()
 
     r = tx.get("r", "0x0")
@@ -77,7 +445,7 @@ def send_to_web3firewall(tx):
         except Exception:
             v = "0x0"
 
-    body = {
+    return {
         "kind": "transaction:broadcasted",
         "datetime": tx_time,
         "data": {
@@ -95,37 +463,542 @@ def send_to_web3firewall(tx):
         }
     }
 
-    headers = {
-        "Authorization": f"Bearer {WEB3FIREWALL_TOKEN}",
-        "Content-Type": "application/json"
-    }
+def send_to_web3firewall(tx, client=None, timeout=None):
+    """
+    Return the risk response for one transaction; raises on failure.
 
-    try:
-        response = requests.post(WEB3FIREWALL_API_URL, json=body, headers=headers)
-        response.raise_for_status()
-        print(f"{tx['hash']} → Risk Response: {response.json()}")
-    except Exception as e:
-        print(f"Failed to send {tx['hash']} to Web3Firewall: {e}")
+    Transactions the local pre-filter can decide never reach the API.
+    """
+    with _metrics.timer("normalize"):
+        event = build_event(tx)
+    prefilter = get_prefilter()
+    if prefilter is not None:
+        with _metrics.timer("prefilter"):
+            decision = prefilter.check(event)
+        if decision is not None:
+            _metrics.count("decisions", source="prefilter")
+            return decision
+    fresh = time.time() - int(tx["timeStamp"]) <= FRESH_TX_AGE
+    with _metrics.timer("submit"):
+        response = (client or get_client()).evaluate(event, timeout, HIGH if fresh else LOW)
+    _metrics.count("decisions", source="remote")
+    return response
 
-if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python monitor.py <ethereum_address> <lookback_hours>")
-        sys.exit(1)
+def submit_transactions(txs, concurrency=SUBMIT_CONCURRENCY, timeout=REQUEST_TIMEOUT):
+    """Submit `txs` with up to `concurrency` requests in flight; yields `(tx, response, error)` in order."""
+    client = get_client(concurrency, timeout)
+    return ordered_map(lambda tx: send_to_web3firewall(tx, client, timeout), txs, concurrency)
+
+# === WATCHLIST MODE ===
+ADDRESS_RE = re.compile(r"^0x[0-9a-f]{40}$")
+DIRECTIONS = {"in": ("to",), "out": ("from",), "both": ("to", "from")}
+SCAN_FAILED = "*"   # stands for the whole watch set in screen()'s `failed` set
+
+def load_watchlist(path):
+    """
+    Read a watchlist into a de-duplicated list of lowercase addresses.
 
-    target_address = sys.argv[1].lower()
+    For an index built with `python address_index.py build` the
+    memory-mapped AddressIndex itself is returned; it iterates as the same
+    lowercase addresses, but block scans match against it directly.
+    """
+    if AddressIndex.is_index_file(path):
+        return AddressIndex.load(path)
+
+    addresses = {}
+    with open(path, "r") as f:
+        for line_no, line in enumerate(f, 1):
+            address = line.split("#", 1)[0].strip().lower()
+            if not address:
+                continue
+            if not ADDRESS_RE.match(address):
+                print(f"Skipping invalid address on line {line_no} of {path}: {address}")
+                continue
+            addresses[address] = None
+    return list(addresses)
+
+def split_watchlist(watchlist, shard, workers):
+    """Return the K/N `shard` of `watchlist` (a list or an AddressIndex) split into `workers` slices."""
+    shard_index, shard_count = shard
+    if isinstance(watchlist, AddressIndex):
+        if shard_count == 1 and workers == 1:
+            return [watchlist]
+        return [watchlist.shard(shard_index + shard_count * i, shard_count * workers) for i in range(workers)]
+    addresses = watchlist[shard_index::shard_count]
+    return [addresses[i::workers] for i in range(workers)]
+
+def watch_index_for(addresses, options):
+    """Return the AddressIndex block scans match `addresses` against, or None for Etherscan."""
+    if isinstance(addresses, AddressIndex):
+        return addresses
+    return AddressIndex.from_addresses(addresses) if options.rpc_url else None
+
+def parse_shard(value):
     try:
-        lookback_hours = int(sys.argv[2])
+        index, count = (int(part) for part in value.split("/"))
     except ValueError:
-        print("The second argument must be an integer (hours).")
-        sys.exit(1)
+        raise argparse.ArgumentTypeError("shard must look like K/N, e.g. 0/4")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError("shard K/N needs N >= 1 and 0 <= K < N")
+    return index, count
+
+def iter_watchlist_transactions(addresses, cutoff_timestamp, concurrency=ETHERSCAN_CONCURRENCY,
+                                start_blocks=None, failed=None, directions=("to",), end_block=None):
+    """
+    Fetch `addresses` in parallel and stream their transactions (up to
+    `end_block`, if given), address by address.
+
+    `start_blocks` optionally maps an address to the first block to fetch;
+    those incremental fetches take priority over addresses still being
+    backfilled from the cutoff. The block mined at the cutoff is looked up
+    once per pass for all of them. Addresses whose fetch fails are reported
+    and added to the `failed` set.
+    """
+    start_blocks = start_blocks or {}
+    cutoff_block = None
+    if any(address not in start_blocks for address in addresses):
+        try:
+            cutoff_block = get_block_by_timestamp(cutoff_timestamp)
+        except Exception as e:
+            print(f"Error looking up the cutoff block on Etherscan: {e}")
+            if failed is not None:
+                failed.update(address for address in addresses if address not in start_blocks)
+            addresses = [address for address in addresses if address in start_blocks]
+
+    def fetch(address):
+        start_block = start_blocks.get(address)
+        priority = LOW if start_block is None else HIGH
+        if start_block is None:
+            start_block = cutoff_block
+        return list(fetch_transactions(address, cutoff_timestamp, start_block, priority, directions, end_block))
+
+    for address, txs, error in ordered_map(fetch, addresses, concurrency):
+        if error is not None:
+            print(f"Error fetching transactions for {address} from Etherscan: {error}")
+            if failed is not None:
+                failed.add(address)
+            continue
+        yield from txs
+
+def iter_rpc_transactions(watch_index, cutoff_timestamp, start_block, options, failed, end_block=None):
+    """
+    Scan blocks from the JSON-RPC node for transactions involving the
+    addresses in `watch_index` (an AddressIndex).
+
+    The range starts at `start_block` (or the block mined at the cutoff when
+    None) and ends at `end_block`, by default the node's head. A failed
+    scan adds SCAN_FAILED to `failed`.
+    """
+    connector = get_connector(options)
+    try:
+        if end_block is None:
+            end_block = connector.get_block_number()
+        if start_block is None:
+            start_block = connector.get_block_by_timestamp(cutoff_timestamp)
+        yield from connector.scan(start_block, end_block, watch_index, DIRECTIONS[options.direction])
+    except Exception as e:
+        print(f"Error scanning blocks from {options.rpc_url}: {e}")
+        failed.add(SCAN_FAILED)
+
+def get_head(options):
+    """Return the current chain head from the configured data source."""
+    if options.rpc_url:
+        return get_connector(options).get_block_number()
+    return get_block_number()
+
+def screen(addresses, cutoff_timestamp, start_blocks, options, is_new=None, on_verdict=None, end_block=None,
+           watch_index=None):
+    """
+    Fetch and evaluate one pass over `addresses`.
+
+    Transactions come from the JSON-RPC node when `options.rpc_url` is set,
+    otherwise from Etherscan; either way only up to `end_block`, if given.
+    For Etherscan `start_blocks` maps addresses to their first block; a
+    block scan matches against `watch_index` and starts at the single block
+    `start_blocks` (None for the cutoff).
+    `is_new(tx)` decides whether a fetched transaction still needs a verdict
+    and `on_verdict(tx, response)` is called for every successful one.
+    Returns `(found, skipped, fetched, failed)` where `fetched` maps each
+    address to `{tx_hash: block_number}` of everything the source returned and
+    `failed` holds addresses with a fetch or submit error (SCAN_FAILED when a
+    block scan failed).
+    """
+    failed = set()
+    fetched = {}
+    skipped = 0
+
+    def track(txs):
+        nonlocal skipped
+        for tx in txs:
+            _metrics.count("transactions_fetched")
+            fetched.setdefault(tx["watched"], {})[tx["hash"].lower()] = int(tx["blockNumber"])
+            if is_new and not is_new(tx):
+                _metrics.count("transactions_skipped")
+                skipped += 1
+                continue
+            yield tx
+
+    if options.rpc_url:
+        if watch_index is None:
+            watch_index = AddressIndex.from_addresses(addresses)
+        source = iter_rpc_transactions(watch_index, cutoff_timestamp, start_blocks, options, failed, end_block)
+    else:
+        source = iter_watchlist_transactions(
+            addresses, cutoff_timestamp, options.fetch_concurrency, start_blocks, failed,
+            DIRECTIONS[options.direction], end_block
+        )
+    txs = track(source)
+    found = 0
+    for tx, response, error in submit_transactions(txs, options.concurrency, options.timeout):
+        found += 1
+        started = time.perf_counter()
+        report(tx, response, error)
+        if error is not None:
+            failed.add(tx["watched"])
+            continue
+        if on_verdict:
+            on_verdict(tx, response)
+        for listener in _verdict_listeners:
+            listener(tx, response)
+        _metrics.count("verdicts", action=str(response.get("actionToTake", "")).lower())
+        _metrics.observe("verdict", time.perf_counter() - started)
+    if failed:
+        _metrics.count("addresses_failed", len(addresses) if SCAN_FAILED in failed else len(failed))
+    return found, skipped, fetched, failed
+
+def print_latency_summary():
+    for line in get_client().format_latency_summary():
+        print(f"Web3Firewall latency {line}")
+    if get_prefilter() is not None:
+        print(f"Pre-filter decisions: {get_prefilter().summary()}")
+    for line in _metrics.format_summary():
+        print(f"Stage {line}")
+    sys.stdout.flush()
+
+def write_metrics(options):
+    """Export this process's metrics to `options.metrics`, if set."""
+    if options.metrics:
+        _metrics.write(process_path(options.metrics))
+
+@contextmanager
+def instrumented(options):
+    """Profile the screening done in this process and export its metrics at the end."""
+    with profile(process_path(options.profile), options.profile_mode):
+        try:
+            yield
+        finally:
+            write_metrics(options)
+
+def run_watchlist(addresses, cutoff_timestamp, options):
+    """
+    Screen every address once in this process; returns the number of transactions submitted.
+
+    With `options.state`, fetching resumes `options.reorg_depth` blocks
+    below each address's checkpoint (below the watch set's checkpoint for
+    block scans), hashes already evaluated are skipped, verdicts are
+    recorded as they arrive and checkpoints advance for addresses (or the
+    block scan) screened without errors.
+    """
+    configure_rate_limits(options.etherscan_rps, options.web3firewall_rps)
+    configure_etherscan(options.fetch_concurrency, options.timeout)
+    configure_prefilter(options.prefilter)
+    watch_index = watch_index_for(addresses, options)
+    store = StateStore(options.state) if options.state else None
+    if not store:
+        found, _, _, _ = screen(addresses, cutoff_timestamp, None, options, watch_index=watch_index)
+        print_latency_summary()
+        return found
+
+    # Re-fetch the last reorg_depth blocks below each checkpoint: a
+    # transaction reorged into one of them since the last run is picked up,
+    # while hashes already evaluated are skipped.
+    depth = options.reorg_depth
+    if options.rpc_url:
+        # A block scan covers the whole watch set at once, so it keeps a
+        # single checkpoint; a changed watch set is scanned from the cutoff.
+        watch_set = watch_index.digest()
+        checkpoint = store.get_scan_checkpoint(watch_set)
+        start_blocks = None if checkpoint is None else max(0, checkpoint - depth + 1)
+    else:
+        start_blocks = {
+            address: max(0, block - depth + 1) for address, block in store.get_checkpoints(addresses).items()
+        }
+    # Fetch up to a head read beforehand, so every address screened without
+    # errors - including idle ones - is complete up to that block.
+    end_block = get_head(options)
+    found, skipped, fetched, failed = screen(
+        addresses, cutoff_timestamp, start_blocks, options,
+        is_new=lambda tx: not store.is_evaluated(tx["hash"]),
+        on_verdict=store.record_verdict,
+        end_block=end_block,
+        watch_index=watch_index
+    )
+    if not options.rpc_url:
+        store.set_checkpoints({address: end_block for address in addresses if address not in failed})
+    elif not failed:
+        store.set_scan_checkpoint(watch_set, end_block)
+    store.close()
+    if skipped:
+        print(f"Skipped {skipped} transactions already evaluated in earlier runs.")
+    print_latency_summary()
+    return found
+
+# === DAEMON MODE ===
+def install_stop_handlers(stop):
+    """Set `stop` on SIGINT/SIGTERM so the current iteration can finish cleanly."""
+    def handle(signum, frame):
+        if not stop.is_set():
+            print(f"Received signal {signum}; stopping after the current iteration...")
+        stop.set()
+    signal.signal(signal.SIGINT, handle)
+    signal.signal(signal.SIGTERM, handle)
+
+def report_dropped(address, window, seen, window_start):
+    """Report hashes from the last reorg `window` of `address` that a re-fetch from `window_start` did not return."""
+    for tx_hash, block in window.items():
+        if block >= window_start and tx_hash not in seen:
+            print(f"{tx_hash} to {address} (block {block}) is no longer on chain; "
+                  f"its verdict was already submitted")
 
-    cutoff_ts = int((datetime.now(timezone.utc) - timedelta(hours=lookback_hours)).timestamp())
+def follow_watchlist(addresses, cutoff_timestamp, options, stop=None):
+    """
+    Follow the chain head for `addresses` until `stop` is set.
 
-    print(f"Scanning {target_address} for the last {lookback_hours} hours...")
+    Every `options.poll_interval` seconds the current head is read and each
+    address is fetched again from `options.reorg_depth` blocks below its
+    checkpoint (block scans restart that far below the single checkpoint of
+    the watch set), so transactions that moved to another block in a reorg
+    are picked up while hashes already evaluated are not resubmitted. Hashes
+    that vanish from that window are reported as dropped. Clients, pools and
+    the state store stay open between iterations.
+    """
+    if stop is None:
+        stop = threading.Event()
+        install_stop_handlers(stop)
+    configure_rate_limits(options.etherscan_rps, options.web3firewall_rps)
+    configure_etherscan(options.fetch_concurrency, options.timeout)
+    configure_prefilter(options.prefilter)
+    watch_index = watch_index_for(addresses, options)
+    store = StateStore(options.state) if options.state else None
+    if options.rpc_url:
+        watch_set = watch_index.digest()
+        checkpoint = store.get_scan_checkpoint(watch_set) if store else None
+    else:
+        checkpoints = store.get_checkpoints(addresses) if store else {}
+    recent = {}   # address -> {tx_hash: block_number} within the reorg window
+    depth = options.reorg_depth
+    total = 0
 
-    txs = get_recent_transactions(target_address, cutoff_ts)
+    def is_new(tx):
+        tx_hash = tx["hash"].lower()
+        if tx_hash in recent.get(tx["watched"], {}):
+            return False
+        return not (store and store.is_evaluated(tx_hash))
 
-    print(f"\nFound {len(txs)} transactions to {target_address}.\n")
+    def window(seen, head):
+        return {tx_hash: block for tx_hash, block in seen.items() if block > head - depth}
 
-    for tx in txs:
-        send_to_web3firewall(tx)
+    while not stop.is_set():
+        try:
+            head = get_head(options)
+        except Exception as e:
+            print("Error reading chain head:", e)
+            stop.wait(options.poll_interval)
+            continue
+
+        if options.rpc_url:
+            start_blocks = None if checkpoint is None else max(0, checkpoint - depth + 1)
+        else:
+            start_blocks = {address: max(0, block - depth + 1) for address, block in checkpoints.items()}
+        found, _, fetched, failed = screen(
+            addresses, cutoff_timestamp, start_blocks, options,
+            is_new=is_new, on_verdict=store.record_verdict if store else None, end_block=head,
+            watch_index=watch_index
+        )
+        total += found
+
+        if options.rpc_url:
+            # Only addresses with transactions in the window are tracked.
+            if not failed:
+                if start_blocks is not None:
+                    for address, txs in recent.items():
+                        report_dropped(address, txs, fetched.get(address, {}), start_blocks)
+                recent.clear()
+                for address, seen in fetched.items():
+                    txs = window(seen, head)
+                    if txs:
+                        recent[address] = txs
+                checkpoint = head
+                if store:
+                    store.set_scan_checkpoint(watch_set, head)
+        else:
+            advanced = {}
+            for address in addresses:
+                if address in failed:
+                    continue
+                seen = fetched.get(address, {})
+                if address in start_blocks:
+                    report_dropped(address, recent.get(address, {}), seen, start_blocks[address])
+                recent[address] = window(seen, head)
+                checkpoints[address] = head
+                advanced[address] = head
+            if store:
+                store.set_checkpoints(advanced)
+        write_metrics(options)
+
+        stop.wait(options.poll_interval)
+
+    if store:
+        store.close()
+    print(f"Stopped following {len(addresses)} addresses; {total} transactions submitted.")
+    print_latency_summary()
+    return total
+
+def _follow_worker(addresses, cutoff_timestamp, options):
+    with instrumented(options):
+        follow_watchlist(addresses, cutoff_timestamp, options)
+
+def _watchlist_worker(addresses, cutoff_timestamp, options):
+    with instrumented(options):
+        return run_watchlist(addresses, cutoff_timestamp, options)
+
+def follow_in_workers(shards, cutoff_timestamp, options):
+    """Run follow_watchlist for each shard in its own process and forward stop signals."""
+    processes = [
+        multiprocessing.Process(target=_follow_worker, args=(shard, cutoff_timestamp, options))
+        for shard in shards
+    ]
+    for process in processes:
+        process.start()
+
+    def forward(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+    signal.signal(signal.SIGINT, forward)
+    signal.signal(signal.SIGTERM, forward)
+
+    for process in processes:
+        process.join()
+
+def report(tx, response, error):
+    if error is not None:
+        print(f"Failed to send {tx['hash']} to Web3Firewall: {error}")
+    else:
+        print(f"{tx['hash']} → Risk Response: {response}")
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be a positive integer")
+    return number
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Screen recent transactions to an Ethereum address with Web3Firewall."
+    )
+    parser.add_argument("address", metavar="ethereum_address", nargs="?")
+    parser.add_argument("lookback_hours", type=int)
+    parser.add_argument("--watchlist", metavar="FILE",
+                        help="screen every address listed in FILE instead of a single address")
+    parser.add_argument("--workers", type=positive_int, default=1,
+                        help="processes to split the watchlist across (default: 1)")
+    parser.add_argument("--shard", type=parse_shard, default=(0, 1), metavar="K/N",
+                        help="only handle the K-th of N slices of the watchlist")
+    parser.add_argument("--fetch-concurrency", type=positive_int, default=ETHERSCAN_CONCURRENCY,
+                        help=f"watchlist addresses fetched in parallel (default: {ETHERSCAN_CONCURRENCY})")
+    parser.add_argument("--state", metavar="DB",
+                        help="SQLite file for checkpoints and verdicts; enables incremental runs")
+    parser.add_argument("--follow", action="store_true",
+                        help="keep running and screen new transactions as blocks are mined")
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL,
+                        help=f"seconds between head checks in --follow mode (default: {POLL_INTERVAL})")
+    parser.add_argument("--reorg-depth", type=positive_int, default=REORG_DEPTH,
+                        help=f"blocks below the checkpoint re-checked on every run or --follow iteration "
+                             f"(default: {REORG_DEPTH})")
+    parser.add_argument("--direction", choices=sorted(DIRECTIONS), default="in",
+                        help="screen transactions into (default), out of, or both ways of watched addresses")
+    parser.add_argument("--rpc-url", default=RPC_URL,
+                        help="scan blocks from this Ethereum JSON-RPC endpoint instead of Etherscan")
+    parser.add_argument("--rpc-batch-size", type=positive_int, default=RPC_BATCH_SIZE,
+                        help=f"blocks per JSON-RPC batch request (default: {RPC_BATCH_SIZE})")
+    parser.add_argument("--etherscan-rps", type=float, default=ETHERSCAN_RATE_LIMIT,
+                        help=f"Etherscan requests/second, split across workers; 0 = unlimited "
+                             f"(default: {ETHERSCAN_RATE_LIMIT})")
+    parser.add_argument("--web3firewall-rps", type=float, default=WEB3FIREWALL_RATE_LIMIT,
+                        help=f"Web3Firewall requests/second, split across workers; 0 = unlimited "
+                             f"(default: {WEB3FIREWALL_RATE_LIMIT})")
+    parser.add_argument("--prefilter", metavar="RULES", default=PREFILTER_RULES_PATH,
+                        help="JSON rules for deciding obvious transactions locally (see prefilter.py)")
+    parser.add_argument("--metrics", metavar="FILE", default=METRICS_PATH,
+                        help="write stage counters and latency histograms to FILE at exit "
+                             "(Prometheus text if FILE ends in .prom, JSON otherwise)")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="write a profile of the run to FILE (see --profile-mode)")
+    parser.add_argument("--profile-mode", choices=PROFILE_MODES, default="sample",
+                        help="sample: collapsed stacks of all threads (default); cprofile: main thread only")
+    parser.add_argument("--concurrency", type=positive_int, default=SUBMIT_CONCURRENCY,
+                        help=f"Web3Firewall requests in flight (default: {SUBMIT_CONCURRENCY})")
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT,
+                        help=f"per-request timeout in seconds (default: {REQUEST_TIMEOUT})")
+    args = parser.parse_args(argv)
+    if bool(args.address) == bool(args.watchlist):
+        parser.error("give either an <ethereum_address> or --watchlist FILE")
+    return args
+
+def main_watchlist(args, cutoff_ts):
+    shard_index, shard_count = args.shard
+    watchlist = load_watchlist(args.watchlist)
+    address_count = len(range(shard_index, len(watchlist), shard_count))
+    workers = min(args.workers, address_count) or 1
+    shards = split_watchlist(watchlist, args.shard, workers)
+    # Every worker paces itself, so give each its share of the API rate limits.
+    args.etherscan_rps /= workers
+    args.web3firewall_rps /= workers
+
+    if args.follow:
+        print(f"Following {address_count} watched addresses across {workers} worker(s), "
+              f"starting {args.lookback_hours} hours back. Press Ctrl-C to stop.")
+        if workers == 1:
+            _follow_worker(shards[0], cutoff_ts, args)
+        else:
+            follow_in_workers(shards, cutoff_ts, args)
+        return
+
+    print(f"Scanning {address_count} watched addresses for the last {args.lookback_hours} hours "
+          f"across {workers} worker(s)...")
+
+    if workers == 1:
+        found = _watchlist_worker(shards[0], cutoff_ts, args)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_watchlist_worker, shard, cutoff_ts, args) for shard in shards]
+            found = sum(future.result() for future in futures)
+
+    print(f"\nFound {found} transactions to {address_count} watched addresses.")
+
+def run(args):
+    """Run the monitor with already parsed arguments (see parse_args)."""
+    cutoff_ts = int((datetime.now(timezone.utc) - timedelta(hours=args.lookback_hours)).timestamp())
+
+    if args.watchlist:
+        main_watchlist(args, cutoff_ts)
+        return
+
+    target_address = args.address.lower()
+    if args.follow:
+        print(f"Following {target_address}, starting {args.lookback_hours} hours back. Press Ctrl-C to stop.")
+        _follow_worker([target_address], cutoff_ts, args)
+        return
+
+    print(f"Scanning {target_address} for the last {args.lookback_hours} hours...")
+
+    found = _watchlist_worker([target_address], cutoff_ts, args)
+
+    print(f"\nFound {found} transactions to {target_address}.")
+
+def main(argv=None):
+    run(parse_args(argv))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+------------------------------------------------------------
+ Web3Firewall — Ordered Bounded Thread Pool
+------------------------------------------------------------
+
+ordered_map() runs a function over a stream of items on a thread pool
+and yields the outcomes in input order. Used by monitor.py (fetching and
+submission), backfill.py and simulate_evm_txn.py (--bulk).
+
+At most `2 * concurrency` calls are submitted ahead of the oldest one
+still being waited for, so a generator of any length is read only as
+fast as the results are consumed and memory stays bounded.
+------------------------------------------------------------
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _collect(item, future):
+    try:
+        return item, future.result(), None
+    except Exception as e:
+        return item, None, e
+
+
+def ordered_map(fn, items, concurrency):
+    """
+    Run `fn` over `items` on a pool of `concurrency` threads.
+
+    Accepts any iterable (including generators) and yields `(item, result, error)`
+    tuples in input order, with `error` set to the exception a call raised.
+    """
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for item in items:
+            pending.append((item, pool.submit(fn, item)))
+            if len(pending) >= 2 * concurrency:
+                yield _collect(*pending.popleft())
+        while pending:
+            yield _collect(*pending.popleft())
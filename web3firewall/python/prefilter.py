@@ -0,0 +1,135 @@
+"""
+------------------------------------------------------------
+ Web3Firewall — Local Pre-Filter Rules
+------------------------------------------------------------
+
+Decides trivially-decidable transactions locally, before they are sent
+to `/api/v1/policy/event`, and records why. Used by monitor.py
+(`--prefilter RULES`) and check_broadcasted_evm_txn.py
+(PREFILTER_RULES_PATH).
+
+Rules are read from a JSON file. Every address list is either inline or
+a path to a text file (one address per line) or an index built with
+`python address_index.py build`, and is compiled into a set or a
+memory-mapped AddressIndex:
+
+    {
+        "deny_addresses": ["0x..."],           deny if either side matches
+        "internal_addresses": "hot_wallets.txt", allow transfers between two of these
+        "allow_addresses": [...],              allow if either side matches
+        "known_counterparties": "known.idx",   allow if either side matches ...
+        "known_counterparty_max_value": "10000000000000000000",
+                                               ... and value <= this (wei)
+        "max_local_allow_value": "50000000000000000000",
+                                               never allow above this locally
+        "allow_zero_value": true,              allow 0-value transfers without calldata
+        "dust_value": "1000000000000"          allow plain transfers below this (wei)
+    }
+
+Rules are applied in this order: deny list, internal transfer, value
+ceiling, allow list, known counterparties, zero value, dust. The first
+one that matches decides. A transaction no rule decides goes to the API
+as before. Zero-value and dust rules only match transfers without
+calldata, because a token transfer or contract call carries value in
+its calldata.
+------------------------------------------------------------
+"""
+
+import json
+import threading
+
+from address_index import AddressIndex
+
+EMPTY_INPUT = ("", "0x", "0X")
+
+
+def _to_int(value):
+    if value is None or value == "":
+        return 0
+    if isinstance(value, str) and value[:2] in ("0x", "0X"):
+        return int(value, 16)
+    return int(value)
+
+
+def load_addresses(spec):
+    """Compile an inline list or a file path into a container supporting `in` with lowercase hex."""
+    if not spec:
+        return frozenset()
+    if isinstance(spec, str):
+        if AddressIndex.is_index_file(spec):
+            return AddressIndex.load(spec)
+        with open(spec, "r") as f:
+            spec = [line.split("#", 1)[0].strip() for line in f]
+    return frozenset(address.lower() for address in spec if address)
+
+
+class Prefilter:
+    def __init__(self, rules):
+        self.deny = load_addresses(rules.get("deny_addresses"))
+        self.internal = load_addresses(rules.get("internal_addresses"))
+        self.allow = load_addresses(rules.get("allow_addresses"))
+        self.known = load_addresses(rules.get("known_counterparties"))
+        self.known_max_value = _to_int(rules.get("known_counterparty_max_value")) \
+            if rules.get("known_counterparty_max_value") is not None else None
+        self.max_local_allow_value = _to_int(rules.get("max_local_allow_value")) \
+            if rules.get("max_local_allow_value") is not None else None
+        self.allow_zero_value = bool(rules.get("allow_zero_value", False))
+        self.dust_value = _to_int(rules.get("dust_value"))
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+    def _rule(self, sender, recipient, value, plain):
+        if sender in self.deny:
+            return "deny", "deny list: sender"
+        if recipient in self.deny:
+            return "deny", "deny list: recipient"
+        if sender in self.internal and recipient in self.internal:
+            return "allow", "internal transfer"
+        if self.max_local_allow_value is not None and value > self.max_local_allow_value:
+            return None, None
+        if sender in self.allow or recipient in self.allow:
+            return "allow", "allow list"
+        if (sender in self.known or recipient in self.known) and \
+                (self.known_max_value is None or value <= self.known_max_value):
+            return "allow", "known counterparty"
+        if plain and value == 0 and self.allow_zero_value:
+            return "allow", "zero-value transfer"
+        if plain and value < self.dust_value:
+            return "allow", "below dust threshold"
+        return None, None
+
+    def check(self, event):
+        """
+        Return a locally decided response for a policy `event`, or None to ask the API.
+
+        The response has the API's shape (`actionToTake`, `eventId` = None)
+        plus `"source": "prefilter"` and the `reason` of the matching rule.
+        """
+        data = event.get("data", {})
+        sender = (data.get("from") or "").lower()
+        recipient = (data.get("to") or "").lower()
+        try:
+            value = _to_int(data.get("value"))
+        except (TypeError, ValueError):
+            value = None
+        calldata = data.get("data", data.get("input", "0x"))
+        if value is None:
+            action, reason = None, None
+        else:
+            action, reason = self._rule(sender, recipient, value, calldata in EMPTY_INPUT)
+        with self.lock:
+            key = action or "remote"
+            self.counts[key] = self.counts.get(key, 0) + 1
+        if action is None:
+            return None
+        return {"actionToTake": action, "eventId": None, "source": "prefilter", "reason": reason}
+
+    def summary(self):
+        """Return e.g. "12 allow, 1 deny, 40 remote"."""
+        with self.lock:
+            return ", ".join(f"{count} {key}" for key, count in sorted(self.counts.items()))
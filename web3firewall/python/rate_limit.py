@@ -0,0 +1,87 @@
+"""
+------------------------------------------------------------
+ Web3Firewall — Upstream Rate Limiting
+------------------------------------------------------------
+
+Token buckets that pace calls to Etherscan and Web3Firewall so the
+monitor can run right at the allowed request rate.
+
+- one bucket per upstream, shared by every thread of a process
+- HIGH priority callers (fresh head-of-chain work) are always served
+  before LOW priority ones (backfill) waiting on the same bucket
+- adaptive: a 429 / rate-limit reply pauses the bucket for Retry-After
+  (or one token interval) and halves its rate; every success restores
+  part of the configured rate again
+------------------------------------------------------------
+"""
+
+import threading
+import time
+
+HIGH = 0
+LOW = 1
+
+MIN_RATE_FRACTION = 0.1   # adaptive slowdown never goes below this share of the configured rate
+RECOVERY_STEP = 0.05      # share of the configured rate restored per successful call
+
+
+class TokenBucket:
+    def __init__(self, rate=None, burst=None, name="upstream"):
+        """`rate` is in requests per second; None means no steady limit (429 pauses still apply)."""
+        self.name = name
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate or 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.waiting_high = 0
+        self.cond = threading.Condition()
+
+    def _refill(self, now):
+        if self.rate:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, priority=HIGH):
+        """Block until a request may be sent."""
+        with self.cond:
+            if priority == HIGH:
+                self.waiting_high += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if now < self.paused_until:
+                        wait = self.paused_until - now
+                    elif priority == LOW and self.waiting_high:
+                        wait = 1 / self.rate if self.rate else 0.01
+                    elif not self.rate:
+                        return
+                    elif self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    else:
+                        wait = (1 - self.tokens) / self.rate
+                    self.cond.wait(wait)
+            finally:
+                if priority == HIGH:
+                    self.waiting_high -= 1
+                    self.cond.notify_all()
+
+    def penalize(self, retry_after=None):
+        """Record a rate-limit reply: pause, and slow down until calls succeed again."""
+        with self.cond:
+            now = time.monotonic()
+            if self.rate:
+                self.rate = max(self.max_rate * MIN_RATE_FRACTION, self.rate / 2)
+                self.tokens = 0
+            pause = retry_after if retry_after is not None else (1 / self.rate if self.rate else 1.0)
+            self.paused_until = max(self.paused_until, now + pause)
+
+    def reward(self):
+        """Record a successful call, creeping back towards the configured rate."""
+        if self.rate is None or self.rate >= self.max_rate:
+            return
+        with self.cond:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * RECOVERY_STEP)
@@ -0,0 +1,224 @@
+"""
+------------------------------------------------------------
+ Web3Firewall — Ethereum JSON-RPC Connector
+------------------------------------------------------------
+
+Alternative to Etherscan for monitor.py (`--rpc-url`). Block ranges are
+read from any standard Ethereum node with batched
+`eth_getBlockByNumber(<n>, true)` calls, several batches in flight at
+once, and every block is matched against the whole watch set in a
+single pass.
+
+Matching transactions are converted to the same row shape Etherscan's
+`txlist` returns (decimal strings for numbers), so they can be handed
+to send_to_web3firewall unchanged. Unlike Etherscan rows they also carry
+the real `r`, `s` and `v` signature values.
+
+Each batch is retried on its own, with full-jitter exponential backoff,
+after timeouts, connection errors, 429/5xx replies and blocks the node
+does not have yet (a head read from a node slightly ahead of the one
+answering), so one transient failure does not abort a whole scan.
+------------------------------------------------------------
+"""
+
+import itertools
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from web3firewall_client import MAX_BACKOFF, MAX_THROTTLED_RETRIES, RETRY_STATUSES, TRANSIENT_ERRORS
+
+DEFAULT_BATCH_SIZE = 25    # blocks per JSON-RPC batch request
+DEFAULT_CONCURRENCY = 4    # batch requests in flight
+DEFAULT_TIMEOUT = 30       # seconds; full blocks can be large
+DEFAULT_MAX_RETRIES = 3    # attempts per batch after the first one (429s have their own budget)
+DEFAULT_BACKOFF = 0.5      # seconds, base of the exponential backoff
+AVERAGE_BLOCK_TIME = 12    # seconds, used to narrow timestamp lookups
+
+
+class RpcError(Exception):
+    """Raised when the node returns a JSON-RPC error or a malformed reply."""
+
+
+def _int(value):
+    return int(value, 16) if isinstance(value, str) else int(value or 0)
+
+
+def to_txlist_row(tx, block):
+    """Convert a JSON-RPC transaction object into an Etherscan `txlist` style row."""
+    gas_price = tx.get("gasPrice") or tx.get("maxFeePerGas") or "0x0"
+    return {
+        "hash": tx["hash"],
+        "blockNumber": str(_int(block["number"])),
+        "timeStamp": str(_int(block["timestamp"])),
+        "transactionIndex": str(_int(tx.get("transactionIndex"))),
+        "from": tx["from"],
+        "to": tx.get("to") or "",
+        "nonce": str(_int(tx["nonce"])),
+        "value": str(_int(tx["value"])),
+        "input": tx.get("input", "0x"),
+        "gas": str(_int(tx["gas"])),
+        "gasPrice": str(_int(gas_price)),
+        "r": tx.get("r", "0x0"),
+        "s": tx.get("s", "0x0"),
+        "v": tx.get("v") or tx.get("yParity") or "0x0",
+    }
+
+
+class JsonRpcConnector:
+    def __init__(self, url, batch_size=DEFAULT_BATCH_SIZE, concurrency=DEFAULT_CONCURRENCY,
+                 timeout=DEFAULT_TIMEOUT, metrics=None, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff=DEFAULT_BACKOFF):
+        self.url = url
+        self.metrics = metrics  # optional metrics.Metrics; every request is one "fetch" observation
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.ids = itertools.count(1)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(concurrency, 1))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _count(self, name, **labels):
+        if self.metrics is not None:
+            self.metrics.count(name, **labels)
+
+    def _sleep(self, attempt):
+        """Full-jitter exponential backoff before retry number `attempt + 1`."""
+        time.sleep(min(random.uniform(0, self.backoff * (2 ** attempt)), MAX_BACKOFF))
+
+    def call(self, method, *params):
+        """Send a single JSON-RPC request and return its result."""
+        return self.batch([(method, list(params))])[0]
+
+    def batch(self, calls):
+        """Send `[(method, params), ...]` as one batch; returns results in the same order."""
+        requests_ = [
+            {"jsonrpc": "2.0", "id": next(self.ids), "method": method, "params": params}
+            for method, params in calls
+        ]
+        attempt = throttled = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = self.session.post(self.url, json=requests_, timeout=self.timeout)
+            except TRANSIENT_ERRORS as e:
+                response, error = None, e
+            except Exception:
+                self._count("errors", stage="fetch")
+                raise
+            finally:
+                if self.metrics is not None:
+                    self.metrics.observe("fetch", time.perf_counter() - started, source="rpc")
+            if response is not None and response.status_code == 429:
+                self._count("throttled", source="rpc")
+                if throttled >= MAX_THROTTLED_RETRIES:
+                    self._count("errors", stage="fetch")
+                    raise RpcError(f"still rate limited after {MAX_THROTTLED_RETRIES} retries")
+                self._sleep(throttled)
+                throttled += 1
+                continue
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                try:
+                    response.raise_for_status()
+                    replies = response.json()
+                except Exception:
+                    self._count("errors", stage="fetch")
+                    raise
+                break
+            if response is not None:
+                error = RpcError(f"HTTP {response.status_code}: {response.text[:200]}")
+            self._count("errors", stage="fetch")
+            if attempt >= self.max_retries:
+                raise error
+            self._sleep(attempt)
+            attempt += 1
+        if isinstance(replies, dict):
+            # Some nodes answer a rejected batch with a single error object.
+            raise RpcError(replies.get("error", replies))
+        by_id = {reply.get("id"): reply for reply in replies}
+        results = []
+        for request in requests_:
+            reply = by_id.get(request["id"])
+            if reply is None:
+                raise RpcError(f"no reply for {request['method']} id={request['id']}")
+            if reply.get("error"):
+                raise RpcError(f"{request['method']}: {reply['error']}")
+            results.append(reply.get("result"))
+        return results
+
+    def get_block_number(self):
+        return _int(self.call("eth_blockNumber"))
+
+    def get_blocks(self, numbers, full_transactions=True):
+        """Fetch the given block numbers in one batch request, waiting for blocks the node lacks."""
+        for attempt in itertools.count():
+            blocks = self.batch([("eth_getBlockByNumber", [hex(n), full_transactions]) for n in numbers])
+            if all(block is not None for block in blocks):
+                return blocks
+            if attempt >= self.max_retries:
+                raise RpcError(f"node does not have all of blocks {numbers[0]}..{numbers[-1]} yet")
+            self._sleep(attempt)
+
+    def iter_blocks(self, start_block, end_block):
+        """Yield full blocks `start_block..end_block` (inclusive) in ascending order."""
+        batches = (
+            list(range(first, min(first + self.batch_size, end_block + 1)))
+            for first in range(start_block, end_block + 1, self.batch_size)
+        )
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            pending = []
+            for numbers in batches:
+                pending.append(pool.submit(self.get_blocks, numbers))
+                if len(pending) >= 2 * self.concurrency:
+                    yield from pending.pop(0).result()
+            for future in pending:
+                yield from future.result()
+
+    def scan(self, start_block, end_block, watched, directions=("to",)):
+        """
+        Yield txlist-style rows for transactions in the range touching `watched`.
+
+        `watched` is any container of addresses supporting `in` (a set of
+        lowercase strings or an AddressIndex); `directions` lists the fields
+        checked, in order. The matched address is added to each row as
+        "watched".
+        """
+        for block in self.iter_blocks(start_block, end_block):
+            for tx in block.get("transactions", ()):
+                for direction in directions:
+                    address = tx.get(direction)
+                    if address and address.lower() in watched:
+                        row = to_txlist_row(tx, block)
+                        row["watched"] = address.lower()
+                        yield row
+                        break
+
+    def get_block_by_timestamp(self, timestamp):
+        """Return the first block mined at or after `timestamp` (binary search)."""
+        head = self.get_block_number()
+        head_time = _int(self.get_blocks([head], False)[0]["timestamp"])
+        if timestamp > head_time:
+            return head + 1
+        # Start from an estimate a generous margin below the expected block.
+        estimate = head - int((head_time - timestamp) / AVERAGE_BLOCK_TIME * 1.5) - 100
+        low = max(0, estimate)
+        if low and _int(self.get_blocks([low], False)[0]["timestamp"]) >= timestamp:
+            low = 0
+        high = head
+        while low < high:
+            middle = (low + high) // 2
+            if _int(self.get_blocks([middle], False)[0]["timestamp"]) < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def close(self):
+        self.session.close()
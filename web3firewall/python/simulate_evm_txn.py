@@ -10,17 +10,43 @@ Requires:
 - A valid Web3Firewall bearer token
 - A structured transaction input
 
+Bulk mode screens a whole batch (e.g. a payout run) in one go:
+
+    python simulate_evm_txn.py --bulk payouts.jsonl --output verdicts.jsonl
+    python simulate_evm_txn.py --bulk payouts.csv --concurrency 16
+    cat payouts.jsonl | python simulate_evm_txn.py --bulk -
+
+Input is JSON Lines (one transaction, or a full `transaction:prebroadcast`
+event, per line) or CSV with a header row (detected from a .csv name or
+--format csv). Each row is validated and normalized, simulated
+BULK_CONCURRENCY at a time, and written out as one JSON line per input
+row, in input order, as soon as it is ready. Rows are streamed, so memory
+use does not grow with the size of the batch.
+
 For access, visit: https://web3firewall.xyz or contact: sales@web3firewall.xyz
 
 License: Apache 2.0
 """
 
-import requests
+import argparse
+import csv
 import json
+import re
+import sys
+
+from approval_poller import ApprovalPoller
+from ordered_pool import ordered_map
+from verdict_cache import VerdictCache
+from web3firewall_client import Web3FirewallClient, Web3FirewallError
 
 # === CONFIGURATION (EDIT BEFORE USE) ===
 WEB3FIREWALL_API_URL = "https://api.web3firewall.io/api/v1/policy/event"
 WEB3FIREWALL_TOKEN = "YOUR_WEB3FIREWALL_BEARER_TOKEN_HERE"
+VERDICT_CACHE_PATH = None  # e.g. "verdicts.sqlite" to reuse verdicts across runs and processes
+REQUEST_TIMEOUT = 10       # seconds
+MAX_RETRIES = 3            # retries on timeouts, 429 and 5xx
+APPROVAL_QUEUE_PATH = None # e.g. "pending_approvals.sqlite" to hand NEEDSAPPROVAL events to approval_poller.py
+BULK_CONCURRENCY = 8       # simulations in flight in --bulk mode
 
 # === TRANSACTION SIMULATION PAYLOAD ===
 prebroadcast_payload = {
@@ -39,22 +65,34 @@ prebroadcast_payload = {
 }
 
 # === SEND TO WEB3FIREWALL ===
-def simulate_prebroadcast(tx: dict):
-    headers = {
-        "Authorization": f"Bearer {WEB3FIREWALL_TOKEN}",
-        "Content-Type": "application/json"
-    }
+client = Web3FirewallClient(
+    WEB3FIREWALL_TOKEN,
+    api_url=WEB3FIREWALL_API_URL,
+    timeout=REQUEST_TIMEOUT,
+    max_retries=MAX_RETRIES,
+    cache=VerdictCache(path=VERDICT_CACHE_PATH)
+)
 
+_approval_queue = None
+
+def queue_for_approval(event_id, tx, announce=True):
+    """Hand a NEEDSAPPROVAL event to the approval poller's queue, if one is configured."""
+    global _approval_queue
+    if not APPROVAL_QUEUE_PATH or event_id in (None, "N/A"):
+        return
+    if _approval_queue is None:
+        _approval_queue = ApprovalPoller(APPROVAL_QUEUE_PATH)
+    _approval_queue.add(event_id, context={"kind": tx.get("kind"), "data": tx.get("data")})
+    if announce:
+        print(f"[Web3Firewall] Event {event_id} queued for polling in {APPROVAL_QUEUE_PATH}.")
+
+def simulate_prebroadcast(tx: dict):
+    """Simulate and print the verdict for `tx`; returns the response, or None on failure."""
     try:
-        response = requests.post(WEB3FIREWALL_API_URL, headers=headers, json=tx)
-        response.raise_for_status()
-        result = response.json()
-    except requests.RequestException as e:
+        result = client.evaluate(tx)
+    except Web3FirewallError as e:
         print(f"[Web3Firewall] Request failed: {e}")
-        return
-    except ValueError:
-        print("[Web3Firewall] Invalid JSON response:", response.text)
-        return
+        return None
 
     action = result.get("actionToTake", "").lower()
     event_id = result.get("eventId", "N/A")
@@ -64,11 +102,169 @@ def simulate_prebroadcast(tx: dict):
 
     if action == "needsapproval":
         print("[Web3Firewall] This transaction requires manual review.")
+        queue_for_approval(event_id, tx)
     elif action in ("allow", "deny"):
         print("[Web3Firewall] Automated decision returned.")
     else:
         print(f"[Web3Firewall] Unrecognized action: {action}")
+    return result
+
+# === BULK MODE ===
+ADDRESS_RE = re.compile(r"^0x[0-9a-fA-F]{40}$")
+AMOUNT_FIELDS = ("gasLimit", "maxFeePerGas", "maxPriorityFeePerGas", "gasPrice", "value")
+ALIASES = {"gas": "gasLimit", "data": "input"}
+
+class InvalidTransaction(ValueError):
+    """Raised when an input row cannot be turned into a prebroadcast event."""
+
+def to_amount(name, value):
+    """Return a non-negative decimal string for an int, decimal string or 0x-hex string."""
+    try:
+        if isinstance(value, str):
+            value = value.strip()
+            number = int(value, 16) if value[:2].lower() == "0x" else int(value)
+        else:
+            number = int(value)
+    except (TypeError, ValueError):
+        raise InvalidTransaction(f"{name} is not a number: {value!r}")
+    if number < 0:
+        raise InvalidTransaction(f"{name} is negative: {value!r}")
+    return str(number)
+
+def normalize_prebroadcast(row):
+    """Validate one input row and return it as a `transaction:prebroadcast` event."""
+    if "data" in row and isinstance(row["data"], dict):
+        if row.get("kind", "transaction:prebroadcast") != "transaction:prebroadcast":
+            raise InvalidTransaction(f"unsupported kind: {row['kind']!r}")
+        row = row["data"]
+    fields = {}
+    for key, value in row.items():
+        if value is None or value == "":
+            continue
+        fields[ALIASES.get(key, key)] = value
+
+    data = {"network": str(fields.get("network", "ETH"))}
+    for name in ("from", "to"):
+        address = str(fields.get(name, "")).strip()
+        if not ADDRESS_RE.match(address):
+            raise InvalidTransaction(f"{name} is not an address: {address!r}")
+        data[name] = address
+    if "nonce" not in fields:
+        raise InvalidTransaction("nonce is missing")
+    data["nonce"] = int(to_amount("nonce", fields["nonce"]))
+    if "gasLimit" not in fields:
+        raise InvalidTransaction("gasLimit is missing")
+    if "maxFeePerGas" not in fields and "gasPrice" not in fields:
+        raise InvalidTransaction("either maxFeePerGas or gasPrice is required")
+    for name in AMOUNT_FIELDS:
+        if name in fields:
+            data[name] = to_amount(name, fields[name])
+    data.setdefault("value", "0")
+    if "maxFeePerGas" in data:
+        data.setdefault("maxPriorityFeePerGas", "0")
+    data["input"] = str(fields.get("input", "0x"))
+    if not re.match(r"^0x[0-9a-fA-F]*$", data["input"]):
+        raise InvalidTransaction(f"input is not hex data: {data['input'][:20]!r}")
+    return {"kind": "transaction:prebroadcast", "data": data}
+
+def read_rows(f, fmt):
+    """Yield `(line_number, row)` from a JSONL or CSV stream; unparseable lines yield an InvalidTransaction."""
+    if fmt == "csv":
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            row = InvalidTransaction(f"invalid JSON: {e}")
+        if not isinstance(row, (dict, InvalidTransaction)):
+            row = InvalidTransaction("each line must be a JSON object")
+        yield line_number, row
+
+def simulate_row(bulk_client, item):
+    line_number, row = item
+    record = {"line": line_number}
+    if isinstance(row, dict) and row.get("id") is not None:
+        record["id"] = row["id"]
+    try:
+        if isinstance(row, Exception):
+            raise row
+        event = normalize_prebroadcast(row)
+    except InvalidTransaction as e:
+        record.update(status="invalid", error=str(e))
+        return record
+    try:
+        response = bulk_client.evaluate(event)
+    except Web3FirewallError as e:
+        record.update(status="error", error=str(e))
+        return record
+    record.update(status="ok", action=str(response.get("actionToTake", "")).lower(),
+                  eventId=response.get("eventId"), response=response, event=event)
+    return record
+
+def simulate_bulk(source, output, fmt="jsonl", concurrency=BULK_CONCURRENCY):
+    """Simulate every row of the `source` stream and write JSON Lines verdicts to `output`."""
+    bulk_client = Web3FirewallClient(
+        WEB3FIREWALL_TOKEN,
+        api_url=WEB3FIREWALL_API_URL,
+        timeout=REQUEST_TIMEOUT,
+        max_retries=MAX_RETRIES,
+        pool_size=concurrency,
+        cache=client.cache
+    )
+    counts = {}
+    rows = read_rows(source, fmt)
+    for (line_number, _), record, error in ordered_map(lambda item: simulate_row(bulk_client, item), rows,
+                                                       concurrency):
+        if error is not None:
+            record = {"line": line_number, "status": "error", "error": str(error)}
+        event = record.pop("event", None)
+        if record.get("action") == "needsapproval" and APPROVAL_QUEUE_PATH:
+            # stdout may be the verdict stream, so queue silently.
+            queue_for_approval(record["eventId"], event, announce=False)
+        output.write(json.dumps(record) + "\n")
+        key = record.get("action") or record["status"]
+        counts[key] = counts.get(key, 0) + 1
+    output.flush()
+    bulk_client.close()
+    return counts
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate transactions with Web3Firewall before broadcasting.")
+    parser.add_argument("--bulk", metavar="FILE",
+                        help="simulate every transaction in FILE (JSON Lines or CSV; '-' for stdin)")
+    parser.add_argument("--format", choices=("jsonl", "csv"),
+                        help="input format (default: from the file name, else jsonl)")
+    parser.add_argument("--output", metavar="FILE", help="write verdicts to FILE instead of stdout")
+    parser.add_argument("--concurrency", type=int, default=BULK_CONCURRENCY,
+                        help=f"simulations in flight (default: {BULK_CONCURRENCY})")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.bulk:
+        simulate_prebroadcast(prebroadcast_payload)
+        return
+
+    fmt = args.format or ("csv" if args.bulk.lower().endswith(".csv") else "jsonl")
+    source = sys.stdin if args.bulk == "-" else open(args.bulk, "r", newline="")
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        counts = simulate_bulk(source, output, fmt, max(1, args.concurrency))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    # Keep stdout clean for the verdict stream.
+    print("[Web3Firewall] Bulk simulation: " + ", ".join(
+        f"{count} {key}" for key, count in sorted(counts.items())), file=sys.stderr)
 
 # === MAIN ===
 if __name__ == "__main__":
-    simulate_prebroadcast(prebroadcast_payload)
+    main()
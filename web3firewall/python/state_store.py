@@ -0,0 +1,145 @@
+"""
+------------------------------------------------------------
+ Web3Firewall — Monitor State Store
+------------------------------------------------------------
+
+SQLite-backed checkpoint and de-duplication store used by monitor.py
+(`--state FILE`). It records:
+
+- the last fully processed block for every watched address, so the next
+  run only asks Etherscan for newer blocks (JSON-RPC block scans, which
+  cover a whole watch set at once, keep one such checkpoint per watch
+  set instead), and
+- every transaction hash already evaluated by Web3Firewall together with
+  its verdict, so overlapping runs never submit the same hash twice.
+
+Verdicts are written as soon as they arrive and checkpoints only once an
+address has been screened without errors, so a crashed run can simply be
+started again.
+------------------------------------------------------------
+"""
+
+import json
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    address     TEXT PRIMARY KEY,
+    last_block  INTEGER NOT NULL,
+    updated_at  INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scans (
+    watch_set   TEXT PRIMARY KEY,
+    last_block  INTEGER NOT NULL,
+    updated_at  INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS evaluated (
+    tx_hash      TEXT PRIMARY KEY,
+    address      TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    action       TEXT,
+    event_id     TEXT,
+    response     TEXT,
+    evaluated_at INTEGER NOT NULL
+);
+"""
+
+
+class StateStore:
+    def __init__(self, path):
+        self.path = path
+        # Watchlist workers open the same file from several processes.
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def get_checkpoint(self, address):
+        """Return the last processed block for `address`, or None if it was never scanned."""
+        row = self.conn.execute(
+            "SELECT last_block FROM checkpoints WHERE address = ?", (address.lower(),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def get_checkpoints(self, addresses):
+        """Return `{address: last_block}` for the given addresses that have a checkpoint."""
+        return {
+            address: block for address, block in
+            ((address, self.get_checkpoint(address)) for address in addresses)
+            if block is not None
+        }
+
+    def set_checkpoint(self, address, last_block):
+        """Move the checkpoint for `address` forward to `last_block` (never backwards)."""
+        self.set_checkpoints({address: last_block})
+
+    def set_checkpoints(self, last_blocks):
+        """Move several checkpoints forward in one transaction; `last_blocks` maps address to block."""
+        now = int(time.time())
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO checkpoints (address, last_block, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(address) DO UPDATE SET
+                    last_block = MAX(last_block, excluded.last_block),
+                    updated_at = excluded.updated_at
+                """,
+                [(address.lower(), int(block), now) for address, block in last_blocks.items()]
+            )
+
+    def get_scan_checkpoint(self, watch_set):
+        """Return the last block scanned for the `watch_set` digest, or None if it was never scanned."""
+        row = self.conn.execute(
+            "SELECT last_block FROM scans WHERE watch_set = ?", (watch_set,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_scan_checkpoint(self, watch_set, last_block):
+        """Move the block scan checkpoint for `watch_set` forward to `last_block` (never backwards)."""
+        with self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO scans (watch_set, last_block, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(watch_set) DO UPDATE SET
+                    last_block = MAX(last_block, excluded.last_block),
+                    updated_at = excluded.updated_at
+                """,
+                (watch_set, int(last_block), int(time.time()))
+            )
+
+    def is_evaluated(self, tx_hash):
+        row = self.conn.execute(
+            "SELECT 1 FROM evaluated WHERE tx_hash = ?", (tx_hash.lower(),)
+        ).fetchone()
+        return row is not None
+
+    def get_verdict(self, tx_hash):
+        """Return the stored Web3Firewall response for `tx_hash`, or None."""
+        row = self.conn.execute(
+            "SELECT response FROM evaluated WHERE tx_hash = ?", (tx_hash.lower(),)
+        ).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def record_verdict(self, tx, response):
+        """Persist the Web3Firewall `response` for a monitor `tx` row."""
+        with self.conn:
+            self.conn.execute(
+                """
+                INSERT OR REPLACE INTO evaluated
+                    (tx_hash, address, block_number, action, event_id, response, evaluated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    tx["hash"].lower(),
+                    tx.get("watched") or (tx.get("to") or "").lower(),
+                    int(tx["blockNumber"]),
+                    str(response.get("actionToTake", "")).lower(),
+                    response.get("eventId"),
+                    json.dumps(response),
+                    int(time.time())
+                )
+            )
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,112 @@
+"""
+------------------------------------------------------------
+ Web3Firewall — Verdict Cache
+------------------------------------------------------------
+
+Bounded LRU cache of Web3Firewall responses, shared by monitor.py,
+check_broadcasted_evm_txn.py and simulate_evm_txn.py.
+
+Entries are keyed by a SHA-256 of the canonical JSON form of the event
+payload, so retries, replays and repeated prebroadcast simulations of the
+same transaction are answered locally. How long a verdict stays valid
+depends on its `actionToTake` (see DEFAULT_TTLS): final decisions are kept
+for a day, pending reviews only briefly so the eventual decision is picked
+up. Unrecognized actions are never cached.
+
+Pass `path` to back the cache with a SQLite file; separate processes
+pointing at the same file then share verdicts as well.
+------------------------------------------------------------
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 10000
+PRUNE_EVERY = 1000               # disk writes between sweeps of expired rows
+DEFAULT_TTLS = {                 # seconds, by lowercase actionToTake
+    "allow": 24 * 60 * 60,
+    "deny": 24 * 60 * 60,
+    "needsapproval": 60,
+}
+
+
+def canonical_key(event):
+    """Return a stable hex digest for an event payload, independent of key order."""
+    encoded = json.dumps(event, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class VerdictCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttls=None, path=None):
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.entries = OrderedDict()   # key -> (expires_at, response)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.conn = None
+        if path:
+            self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS verdicts ("
+                " key TEXT PRIMARY KEY, response TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def get(self, event):
+        """Return the cached response for `event`, or None if missing or expired."""
+        key = canonical_key(event)
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None and self.conn is not None:
+                row = self.conn.execute(
+                    "SELECT expires_at, response FROM verdicts WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    entry = (row[0], json.loads(row[1]))
+                    self._remember(key, entry)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    self.entries.pop(key, None)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, event, response):
+        """Cache `response` for `event` if its action has a positive TTL."""
+        action = str(response.get("actionToTake", "")).lower()
+        ttl = self.ttls.get(action, 0)
+        if ttl <= 0:
+            return
+        key = canonical_key(event)
+        entry = (time.time() + ttl, dict(response))
+        with self.lock:
+            self._remember(key, entry)
+            if self.conn is not None:
+                with self.conn:
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO verdicts (key, response, expires_at) VALUES (?, ?, ?)",
+                        (key, json.dumps(entry[1]), entry[0])
+                    )
+                    self.writes += 1
+                    if self.writes % PRUNE_EVERY == 0:
+                        self.conn.execute("DELETE FROM verdicts WHERE expires_at <= ?", (time.time(),))
+
+    def _remember(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
@@ -0,0 +1,201 @@
+"""
+------------------------------------------------------------
+ Web3Firewall — API Client
+------------------------------------------------------------
+
+Single HTTP client for the `/api/v1/policy/event` endpoint, used by
+monitor.py (broadcasted), check_broadcasted_evm_txn.py (broadcasted),
+simulate_evm_txn.py (prebroadcast) and approval_poller.py (status of
+events waiting for manual review).
+
+- keep-alive connections from one pooled requests.Session
+- hard connect/read timeout on every request
+- bounded retries with full-jitter exponential backoff on connection
+  errors, timeouts, truncated replies, 429 and 5xx (Retry-After is
+  honoured on 429/503); every failure surfaces as Web3FirewallError
+- optional VerdictCache consulted before the network
+- optional rate_limit.TokenBucket paced per attempt and slowed on 429
+- p50/p95/p99 latency per event `kind`, see `latency_summary()`
+------------------------------------------------------------
+"""
+
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limit import HIGH
+
+DEFAULT_API_URL = "https://api.web3firewall.io/api/v1/policy/event"
+# Assumed status endpoint for a single event: GET <DEFAULT_STATUS_URL>/<eventId>
+DEFAULT_STATUS_URL = DEFAULT_API_URL
+DEFAULT_TIMEOUT = 10        # seconds
+DEFAULT_MAX_RETRIES = 3     # attempts after the first one
+DEFAULT_BACKOFF = 0.5       # seconds, base of the exponential backoff
+MAX_BACKOFF = 30            # seconds, cap for a single wait
+MAX_THROTTLED_RETRIES = 10  # extra 429 retries allowed when a limiter paces the calls
+LATENCY_WINDOW = 10000      # samples kept per event kind
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Request errors worth another attempt; any other RequestException is raised at once.
+TRANSIENT_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+
+class Web3FirewallError(Exception):
+    """Raised when an event could not be evaluated, after retries."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class LatencyTracker:
+    """Thread-safe sliding window of request latencies, grouped by event kind."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def record(self, kind, seconds):
+        with self.lock:
+            if kind not in self.samples:
+                self.samples[kind] = deque(maxlen=self.window)
+            self.samples[kind].append(seconds)
+
+    def percentiles(self, kind, points=(50, 95, 99)):
+        """Return `{"p50": ..., ...}` in seconds for `kind`, or {} without samples."""
+        with self.lock:
+            values = sorted(self.samples.get(kind, ()))
+        if not values:
+            return {}
+        return {
+            f"p{point}": values[min(len(values) - 1, int(len(values) * point / 100))]
+            for point in points
+        }
+
+    def summary(self):
+        """Return `{kind: {"count": n, "p50": s, "p95": s, "p99": s}}`."""
+        with self.lock:
+            kinds = {kind: len(values) for kind, values in self.samples.items()}
+        return {kind: dict(count=count, **self.percentiles(kind)) for kind, count in kinds.items()}
+
+
+def retry_after_seconds(response):
+    """Return the Retry-After delay of `response` in seconds, if it gives one."""
+    value = response.headers.get("Retry-After")
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class Web3FirewallClient:
+    def __init__(self, token, api_url=DEFAULT_API_URL, timeout=DEFAULT_TIMEOUT,
+                 max_retries=DEFAULT_MAX_RETRIES, backoff=DEFAULT_BACKOFF,
+                 pool_size=10, cache=None, limiter=None, status_url=None):
+        self.token = token
+        self.api_url = api_url
+        self.status_url = status_url or api_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.cache = cache
+        self.limiter = limiter
+        self.latency = LatencyTracker()
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json"
+        })
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(pool_size, 1))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def evaluate(self, event, timeout=None, priority=HIGH):
+        """
+        Submit `event` and return the decoded risk response.
+
+        Served from the cache when a fresh verdict exists. `priority` orders
+        the call against others waiting on the same limiter. Raises
+        Web3FirewallError once retries are exhausted or on a non-retryable
+        response.
+        """
+        if self.cache is not None:
+            cached = self.cache.get(event)
+            if cached is not None:
+                return cached
+
+        result = self._request("POST", self.api_url, event, event.get("kind", "unknown"),
+                               timeout or self.timeout, priority)
+        if self.cache is not None:
+            self.cache.put(event, result)
+        return result
+
+    def get_event(self, event_id, timeout=None, priority=HIGH):
+        """Return the current response for a previously submitted event (e.g. after manual review)."""
+        url = f"{self.status_url.rstrip('/')}/{event_id}"
+        return self._request("GET", url, None, "event:status", timeout or self.timeout, priority)
+
+    def _request(self, method, url, event, kind, timeout, priority):
+        attempt = 0
+        throttled = 0
+        while True:
+            if self.limiter is not None:
+                self.limiter.acquire(priority)
+            started = time.monotonic()
+            delay = None
+            try:
+                response = self.session.request(method, url, json=event, timeout=timeout)
+            except TRANSIENT_ERRORS as e:
+                error = Web3FirewallError(f"request failed: {e}")
+            except requests.RequestException as e:
+                raise Web3FirewallError(f"request failed: {e}") from e
+            else:
+                self.latency.record(kind, time.monotonic() - started)
+                if response.ok:
+                    if self.limiter is not None:
+                        self.limiter.reward()
+                    try:
+                        return response.json()
+                    except ValueError:
+                        raise Web3FirewallError(
+                            f"invalid JSON response: {response.text[:200]}", response.status_code
+                        )
+                error = Web3FirewallError(
+                    f"HTTP {response.status_code}: {response.text[:200]}", response.status_code
+                )
+                if response.status_code not in RETRY_STATUSES:
+                    raise error
+                delay = retry_after_seconds(response)
+                if response.status_code == 429 and self.limiter is not None and throttled < MAX_THROTTLED_RETRIES:
+                    # The limiter now holds back every caller, including this one,
+                    # so a throttled attempt does not use up the retry budget.
+                    self.limiter.penalize(delay)
+                    throttled += 1
+                    continue
+
+            if attempt >= self.max_retries:
+                raise error
+            if delay is None:
+                delay = random.uniform(0, self.backoff * (2 ** attempt))
+            time.sleep(min(delay, MAX_BACKOFF))
+            attempt += 1
+
+    def latency_summary(self):
+        return self.latency.summary()
+
+    def format_latency_summary(self):
+        """Return one human-readable line per event kind, in milliseconds."""
+        lines = []
+        for kind, stats in sorted(self.latency_summary().items()):
+            lines.append(
+                f"{kind}: n={stats['count']} p50={stats['p50'] * 1000:.0f}ms "
+                f"p95={stats['p95'] * 1000:.0f}ms p99={stats['p99'] * 1000:.0f}ms"
+            )
+        return lines
+
+    def close(self):
+        self.session.close()